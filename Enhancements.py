@@ -12,83 +12,224 @@ New Features:
 5. Advanced Analytics
 """
 
-import plotly.graph_objects as go
-from scipy.interpolate import splprep, splev
-import plotly.express as px
+import json
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+
+from lankaland.corners import DEFAULT_THRESHOLD
+from lankaland.exporters import plot_color
+from lankaland.geodesy import as_coords, segment_lengths
+from lankaland.geometry_cache import batch_metrics, coords_key, plot_metrics
+from lankaland.lod import simplify_indices
+from lankaland.projection import projection_for
+from lankaland.rings import PlotSet
+
+# plotly and scipy are imported inside the functions that draw charts or fit
+# splines, so the measurement and report functions load without them
 
 # ═══════════════════════════════════════════════════════════════
 # FEATURE 1: IRREGULAR SHAPE TOOLS (කුඹුරු Mode)
 # ═══════════════════════════════════════════════════════════════
 
-def smooth_boundary_curve(points, density=10):
+SMOOTH_TOLERANCE_M = 0.05      # max gap between the smoothed curve and the chords drawn through its samples
+DEFAULT_GPS_ACCURACY_M = 3.0   # typical phone fix; pass the receiver's own figure when known
+EVAL_PER_POINT = 8             # curvature evaluations per walked point (keeps cost linear)
+CORNER_ARM_ACCURACIES = 5      # both edges at a corner are at least this many accuracy radii long
+DEGENERATE_WIDTH_M = 1e-3      # points within this RMS distance of one line enclose no area
+
+def _ring_corners(xy, threshold, accuracy_m):
+    """Corner indices of a closed planar ring.
+    
+    The ring is simplified to twice the GPS accuracy, and a kept vertex is a
+    corner when it turns by more than `threshold` degrees between two edges
+    that are each several accuracy radii long. Scatter within the accuracy, and
+    the short edges a tight curve simplifies to, never read as corners.
+    """
+    kept = simplify_indices(np.vstack([xy, xy[:1]]), 2 * accuracy_m)[:-1]
+    if len(kept) < 3:
+        return kept[:0]
+    v = xy[kept]
+    d_in, d_out = v - np.roll(v, 1, axis=0), np.roll(v, -1, axis=0) - v
+    turn = np.degrees(np.abs(np.arctan2(d_in[:, 0] * d_out[:, 1] - d_in[:, 1] * d_out[:, 0],
+                                        np.einsum('ij,ij->i', d_in, d_out))))
+    arm = np.minimum(np.hypot(*d_in.T), np.hypot(*d_out.T))
+    return kept[(turn > threshold) & (arm >= CORNER_ARM_ACCURACIES * accuracy_m)]
+
+def _fit_spline(xy, accuracy_m, periodic):
+    """Smoothing spline through planar points, each weighted by 1/accuracy so s = 2m (two axes) is the expected misfit"""
+    from scipy.interpolate import splprep
+
+    m = len(xy)
+    w = np.full(m, 1.0 / accuracy_m)
+    if not periodic:
+        w[[0, -1]] *= 1e3  # pin the segment to its corners
+    k = min(3, m - 1)
+    tck, _ = splprep(xy.T, w=w, s=2.0 * m, k=k, per=periodic, quiet=1)
+    return tck
+
+def _sample_adaptively(tck, n_eval, tolerance_m, max_samples):
+    """Sample a fitted spline densely where it bends and sparsely where it is straight.
+    
+    A chord of length L on a curve of curvature κ strays L²κ/8 from it, so the
+    spacing allowed at each parameter value is sqrt(8·tolerance/κ).
+    """
+    from scipy.interpolate import splev
+
+    u = np.linspace(0, 1, n_eval)
+    dx, dy = splev(u, tck, der=1)
+    ddx, ddy = splev(u, tck, der=2)
+    speed = np.hypot(dx, dy)
+    kappa = np.abs(dx * ddy - dy * ddx) / np.maximum(speed, 1e-12) ** 3
+    rate = np.sqrt(kappa / (8 * tolerance_m)) * speed + 1e-9
+    cumulative = np.concatenate([[0.0], np.cumsum((rate[1:] + rate[:-1]) / 2 * np.diff(u))])
+    n = int(np.clip(np.ceil(cumulative[-1]), 1, max_samples - 1))
+    u_samples = np.interp(np.linspace(0, cumulative[-1], n + 1), cumulative, u)
+    return np.column_stack(splev(u_samples, tck))
+
+def smooth_boundary_curve(points, density=10, accuracy_m=DEFAULT_GPS_ACCURACY_M,
+                          tolerance_m=SMOOTH_TOLERANCE_M, corner_threshold=DEFAULT_THRESHOLD):
     """
     Create smooth curve through GPS points for irregular shapes
     Essential for කුඹුරු (paddy fields) with curved boundaries
     
+    The ring is split at its corners and each stretch between two corners gets
+    its own smoothing spline (a ring without corners gets one periodic spline),
+    so corners stay sharp and cost grows linearly with the number of points.
+    The smoothing factor follows from the GPS accuracy: the curve may pass about
+    one accuracy radius from each fix. Samples are spaced by curvature so that
+    no chord strays more than tolerance_m from the curve.
+    
     Args:
         points: List of (lat, lon) tuples
-        density: Points per segment (higher = smoother)
+        density: Upper bound on output points per input point
+        accuracy_m: GPS accuracy (1σ, metres) of the walked points
+        tolerance_m: Max distance between the curve and the returned polygon
+        corner_threshold: Turning angle (degrees) at which a point is kept as a corner
     
     Returns:
-        List of smoothed points
+        List of smoothed points (closed ring, first point not repeated); the
+        input points unchanged when fewer than 3 distinct, non-collinear
+        points remain, since there is no ring to smooth
     """
+    original = as_coords(points)
+    # Repeated fixes (standing still) have no direction and break the spline fit
+    coords = original[np.any(original != np.roll(original, 1, axis=0), axis=1)] if len(original) > 1 else original
+    if len(coords) < 3:
+        return [tuple(p) for p in original.tolist()]
+    
+    projection = projection_for(coords)
+    xy = projection.forward(coords)
+    n = len(xy)
+    # Smallest singular value of the centred points is their spread off the best-fit line
+    if np.linalg.svd(xy - xy.mean(axis=0), compute_uv=False)[-1] / np.sqrt(n) < DEGENERATE_WIDTH_M:
+        return [tuple(p) for p in original.tolist()]
+    max_per_point = max(1, int(density))
+    corners = _ring_corners(xy, corner_threshold, accuracy_m)
+    
+    if len(corners) == 0:
+        closed = np.vstack([xy, xy[:1]])
+        tck = _fit_spline(closed, accuracy_m, periodic=True)
+        smooth = _sample_adaptively(tck, EVAL_PER_POINT * n, tolerance_m, max_per_point * n)[:-1]
+        return projection.unproject_coords(smooth)
+    
+    pieces = []
+    for a, b in zip(corners, np.roll(corners, -1)):
+        idx = np.arange(a, b + 1 if b > a else b + n + 1) % n
+        segment = xy[idx]
+        if len(segment) < 3:
+            pieces.append(segment[:1])  # straight edge: the corner alone
+            continue
+        tck = _fit_spline(segment, accuracy_m, periodic=False)
+        samples = _sample_adaptively(tck, EVAL_PER_POINT * len(segment), tolerance_m, max_per_point * len(segment))
+        samples[0] = segment[0]  # corners exactly as surveyed
+        pieces.append(samples[:-1])  # the next piece starts at the end corner
+    return projection.unproject_coords(np.vstack(pieces))
+
+# Ideal: 2-5 meters between points for irregular shapes
+DENSITY_GOOD_M = 5.0    # segments up to this long score 100
+DENSITY_GAP_M = 10.0    # longer segments are gaps (score 30); in between score 70
+DENSITY_CACHE_SIZE = 32
+
+class GapRun(NamedTuple):
+    first: int          # first under-sampled segment (segment i runs from point i to i+1)
+    last: int           # last one, inclusive; may be < first when the run wraps past the closing edge
+    n_segments: int
+    length_m: float     # total length of the stretch
+    longest_m: float    # its longest single segment
+
+class DensityAnalysis(NamedTuple):
+    quality: float      # 0-100, mean per-segment score
+    distances: np.ndarray
+    gaps: tuple         # GapRun per contiguous under-sampled stretch, in ring order
+
+_density_cache = OrderedDict()  # coords key -> DensityAnalysis
+
+def _gap_runs(distances):
+    """Contiguous stretches of gap segments around the closed ring, found with array ops only"""
+    n = len(distances)
+    is_gap = distances > DENSITY_GAP_M
+    if not is_gap.any():
+        return ()
+    if is_gap.all():
+        return (GapRun(0, n - 1, n, float(distances.sum()), float(distances.max())),)
+    edges = np.diff(np.concatenate([[0], is_gap.astype(np.int8), [0]]))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if is_gap[0] and is_gap[-1]:
+        # The run through the closing edge wraps around: it starts with the last run and ends with the first
+        starts, stops = starts[1:], np.append(stops[1:-1], stops[0] + n)
+    
+    # Wrapped runs end past n, so measure over the distances laid out twice
+    doubled = np.concatenate([distances, distances, [0.0]])
+    cumulative = np.concatenate([[0.0], np.cumsum(doubled)])
+    lengths = cumulative[stops] - cumulative[starts]
+    longest = np.maximum.reduceat(doubled, np.column_stack([starts, stops]).ravel())[::2]
+    return tuple(GapRun(int(start), int((stop - 1) % n), int(stop - start), float(length), float(top))
+                 for start, stop, length, top in zip(starts, stops, lengths, longest))
+
+def analyze_point_density(points):
+    """
+    Segment lengths, density score and gap runs of a boundary in one array pass
+    Cached per boundary (content hash), so repeated calls on an unchanged
+    boundary - quality check, confidence, report - cost only the hash
+    """
+    key = coords_key(points)
+    cached = _density_cache.get(key)
+    if cached is not None:
+        _density_cache.move_to_end(key)
+        return cached
+    
     if len(points) < 3:
-        return points
+        analysis = DensityAnalysis(0.0, np.zeros(0), ())
+    else:
+        distances = segment_lengths(points, closed=True)
+        scores = np.where(distances > DENSITY_GAP_M, 30, np.where(distances > DENSITY_GOOD_M, 70, 100))
+        analysis = DensityAnalysis(float(scores.mean()), distances, _gap_runs(distances))
     
-    try:
-        points_array = np.array(points)
-        
-        # Create parametric spline
-        tck, u = splprep(points_array.T, s=0, per=True)
-        
-        # Generate smooth curve
-        u_new = np.linspace(0, 1, len(points) * density)
-        smooth_curve = splev(u_new, tck)
-        
-        return list(zip(smooth_curve[0], smooth_curve[1]))
-    except:
-        return points
+    _density_cache[key] = analysis
+    if len(_density_cache) > DENSITY_CACHE_SIZE:
+        _density_cache.popitem(last=False)
+    return analysis
 
 def calculate_point_density_quality(points):
     """
     Analyze GPS point density to detect areas needing more points
-    Returns quality score and suggestions
+    Returns quality score and one suggestion per under-sampled stretch
     """
     if len(points) < 3:
         return 0, []
     
+    analysis = analyze_point_density(points)
     suggestions = []
-    segment_qualities = []
+    for gap in analysis.gaps:
+        where = (f"Segment {gap.first+1}" if gap.n_segments == 1
+                 else f"Segments {gap.first+1}-{gap.last+1}")
+        suggestions.append(f"{where}: තව points අවශ්‍යයි (distance: {gap.length_m:.1f}m, longest {gap.longest_m:.1f}m)")
     
-    for i in range(len(points)):
-        p1 = points[i]
-        p2 = points[(i + 1) % len(points)]
-        
-        # Calculate distance between consecutive points
-        from math import radians, sin, cos, sqrt, atan2
-        lat1, lon1 = radians(p1[0]), radians(p1[1])
-        lat2, lon2 = radians(p2[0]), radians(p2[1])
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        distance = 2 * 6371000 * atan2(sqrt(a), sqrt(1-a))
-        
-        # Quality based on distance
-        # Ideal: 2-5 meters between points for irregular shapes
-        if distance > 10:
-            quality = 30  # Poor
-            suggestions.append(f"Segment {i+1}: තව points අවශ්‍යයි (distance: {distance:.1f}m)")
-        elif distance > 5:
-            quality = 70  # Fair
-        else:
-            quality = 100  # Good
-        
-        segment_qualities.append(quality)
-    
-    overall_quality = sum(segment_qualities) / len(segment_qualities)
-    
-    return overall_quality, suggestions
+    return analysis.quality, suggestions
 
 def estimate_irregular_area_confidence(points, plots):
     """
@@ -105,8 +246,8 @@ def estimate_irregular_area_confidence(points, plots):
     elif len(points) < 15:
         base_confidence -= 5
     
-    # Point density check
-    quality, _ = calculate_point_density_quality(points)
+    # Point density check (cached analysis of the same boundary)
+    quality = analyze_point_density(points).quality if len(points) >= 3 else 0
     if quality < 50:
         base_confidence -= 20
     elif quality < 70:
@@ -122,70 +263,94 @@ def estimate_irregular_area_confidence(points, plots):
 # FEATURE 2: 3D VISUALIZATION
 # ═══════════════════════════════════════════════════════════════
 
+def extrude_plots(plots, heights):
+    """
+    Triangulate every plot as a prism (walls + roof) into one shared mesh
+    
+    Returns (vertices (V, 3) as lon/lat/height, faces (F, 3) vertex indices,
+    plot index of each vertex). Walls are two triangles per edge, built for all
+    plots at once from one coordinate buffer; roofs are constrained Delaunay
+    triangulations, so concave plots are covered exactly.
+    """
+    plot_set = PlotSet(plots)
+    heights = np.asarray(heights, dtype=np.float64)
+    coords, offsets = plot_set.coords, plot_set.offsets
+    n_plots = len(plot_set)
+    
+    # Drop the repeated closing vertex of closed rings
+    sizes = np.diff(offsets)
+    closed = (sizes > 1) & np.all(coords[np.maximum(offsets[1:] - 1, 0)] == coords[np.minimum(offsets[:-1], len(coords) - 1)], axis=1)
+    keep = np.ones(len(coords), dtype=bool)
+    keep[offsets[1:][closed] - 1] = False
+    ring = coords[keep]
+    ring_plot = np.repeat(np.arange(n_plots), sizes)[keep]
+    sizes = np.bincount(ring_plot, minlength=n_plots)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    
+    # Walls: bottom vertices are 0..m-1, top vertices m..2m-1; edge i -> next(i) within its plot
+    m = len(ring)
+    i = np.arange(m)
+    nxt = i + 1
+    last = starts + sizes - 1
+    nxt[last[sizes > 0]] = starts[sizes > 0]
+    wall_faces = np.concatenate([np.column_stack([i, nxt, nxt + m]), np.column_stack([i, nxt + m, i + m])])
+    wall_vertices = np.vstack([np.column_stack([ring[:, 1], ring[:, 0], np.zeros(m)]),
+                               np.column_stack([ring[:, 1], ring[:, 0], heights[ring_plot]])])
+    
+    # Roofs: triangulate all plots in one call, three fresh vertices per triangle
+    # Plots with under 3 vertices get walls but no roof; rings are numbered densely over the rest
+    solid_plots = np.flatnonzero(sizes >= 3)
+    solid = (sizes >= 3)[ring_plot]
+    solid_index = np.cumsum(sizes >= 3) - 1
+    polygons = shapely.polygons(shapely.linearrings(ring[solid], indices=solid_index[ring_plot[solid]]))
+    triangles, tri_polygon = shapely.get_parts(shapely.constrained_delaunay_triangles(polygons), return_index=True)
+    tri_plot = solid_plots[tri_polygon]
+    tri = shapely.get_coordinates(shapely.get_exterior_ring(triangles)).reshape(-1, 4, 2)[:, :3].reshape(-1, 2)
+    tri_vertex_plot = np.repeat(tri_plot, 3)
+    roof_vertices = np.column_stack([tri[:, 1], tri[:, 0], heights[tri_vertex_plot]])
+    roof_faces = 2 * m + np.arange(len(tri)).reshape(-1, 3)
+    
+    vertices = np.vstack([wall_vertices, roof_vertices])
+    faces = np.vstack([wall_faces, roof_faces])
+    vertex_plot = np.concatenate([ring_plot, ring_plot, tri_vertex_plot])
+    return vertices, faces, vertex_plot
+
 def create_3d_plot_visualization(plots, price_per_perch):
     """
     Create interactive 3D visualization where plot height = value
     Beautiful visual representation of land value distribution
+    
+    All plots go into a single Mesh3d trace (see extrude_plots) colored per
+    vertex, with each vertex carrying its plot's number, area and value for the
+    hover label.
     """
     if not plots:
         return None
+    import plotly.express as px
+    import plotly.graph_objects as go
     
-    fig = go.Figure()
+    # Area and value (cached per coordinate set)
+    areas = np.array([plot_metrics(plot['coords']).area_perch for plot in plots])
+    values = areas * price_per_perch
+    heights = values / 100000  # Scale for visualization
     
-    for idx, plot in enumerate(plots):
-        coords = plot['coords']
-        
-        # Calculate area and value
-        area = 0
-        try:
-            from shapely.geometry import Polygon
-            poly = Polygon(coords)
-            area_m2 = poly.area * (111319.9 ** 2) * abs(np.cos(np.radians(coords[0][0])))
-            area = area_m2 / 25.29
-        except:
-            pass
-        
-        value = area * price_per_perch
-        height = value / 100000  # Scale for visualization
-        
-        # Separate lat/lon
-        lats = [c[0] for c in coords]
-        lons = [c[1] for c in coords]
-        
-        # Create 3D mesh (walls)
-        for i in range(len(coords)):
-            next_i = (i + 1) % len(coords)
-            
-            # Bottom vertices
-            x_bottom = [lons[i], lons[next_i], lons[next_i], lons[i]]
-            y_bottom = [lats[i], lats[next_i], lats[next_i], lats[i]]
-            z_bottom = [0, 0, 0, 0]
-            
-            # Top vertices
-            x_top = [lons[i], lons[next_i], lons[next_i], lons[i]]
-            y_top = [lats[i], lats[next_i], lats[next_i], lats[i]]
-            z_top = [height, height, height, height]
-            
-            # Wall
-            x_wall = [lons[i], lons[next_i], lons[next_i], lons[i]]
-            y_wall = [lats[i], lats[next_i], lats[next_i], lats[i]]
-            z_wall = [0, 0, height, height]
-            
-            color = px.colors.qualitative.Set3[idx % len(px.colors.qualitative.Set3)]
-            
-            fig.add_trace(go.Mesh3d(
-                x=x_wall + x_top,
-                y=y_wall + y_top,
-                z=z_wall + z_top,
-                color=color,
-                opacity=0.7,
-                name=f"Plot {idx+1}",
-                showlegend=(i==0),
-                hovertemplate=f"<b>Plot {idx+1}</b><br>" +
-                             f"Area: {area:.2f} P<br>" +
-                             f"Value: Rs. {value:,.0f}<br>" +
-                             "<extra></extra>"
-            ))
+    vertices, faces, vertex_plot = extrude_plots(plots, heights)
+    palette = np.array(px.colors.qualitative.Set3)
+    hover = np.column_stack([vertex_plot + 1, areas[vertex_plot], values[vertex_plot]])
+    
+    fig = go.Figure(go.Mesh3d(
+        x=vertices[:, 0], y=vertices[:, 1], z=vertices[:, 2],
+        i=faces[:, 0], j=faces[:, 1], k=faces[:, 2],
+        vertexcolor=palette[vertex_plot % len(palette)],
+        opacity=0.7,
+        flatshading=True,
+        name="Plots",
+        customdata=hover,
+        hovertemplate="<b>Plot %{customdata[0]:.0f}</b><br>" +
+                      "Area: %{customdata[1]:.2f} P<br>" +
+                      "Value: Rs. %{customdata[2]:,.0f}<br>" +
+                      "<extra></extra>"
+    ))
     
     # Update layout
     fig.update_layout(
@@ -222,6 +387,7 @@ def create_value_comparison_chart(plots, price_per_perch):
     """
     if not plots:
         return None
+    import plotly.graph_objects as go
     
     plot_numbers = []
     plot_values = []
@@ -231,14 +397,7 @@ def create_value_comparison_chart(plots, price_per_perch):
         coords = plot['coords']
         
         # Calculate area
-        area = 0
-        try:
-            from shapely.geometry import Polygon
-            poly = Polygon(coords)
-            area_m2 = poly.area * (111319.9 ** 2) * abs(np.cos(np.radians(coords[0][0])))
-            area = area_m2 / 25.29
-        except:
-            pass
+        area = plot_metrics(coords).area_perch
         
         value = area * price_per_perch
         
@@ -295,7 +454,7 @@ def export_ar_ready_format(points, plots, project_info):
         
         "boundary": {
             "type": "polygon",
-            "coordinates": points,
+            "coordinates": [[p[0], p[1]] for p in points],
             "marker_color": "#FFFF00",
             "marker_size": 0.3
         },
@@ -306,27 +465,19 @@ def export_ar_ready_format(points, plots, project_info):
     for idx, plot in enumerate(plots):
         coords = plot['coords']
         
-        # Calculate center and area
-        center_lat = sum(c[0] for c in coords) / len(coords)
-        center_lon = sum(c[1] for c in coords) / len(coords)
-        
-        area = 0
-        try:
-            from shapely.geometry import Polygon
-            poly = Polygon(coords)
-            area_m2 = poly.area * (111319.9 ** 2) * abs(np.cos(np.radians(coords[0][0])))
-            area = area_m2 / 25.29
-        except:
-            pass
+        # Center and area (cached per coordinate set)
+        metrics = plot_metrics(coords)
+        center_lat, center_lon = metrics.centroid
+        area = metrics.area_perch
         
         plot_data = {
             "id": idx + 1,
             "type": "polygon",
-            "coordinates": coords,
+            "coordinates": [[p[0], p[1]] for p in coords],
             "center": [center_lat, center_lon],
             "area_perch": round(area, 2),
             "area_sqm": round(area * 25.29, 2),
-            "color": f"#{hex(hash(f'plot_{idx}') % 0xFFFFFF)[2:].zfill(6)}",
+            "color": plot_color(idx + 1),  # same colour as on the map, on every run
             "height": 2.0,  # Height in meters for 3D visualization
             "label": {
                 "text": f"Plot {idx + 1}",
@@ -337,7 +488,7 @@ def export_ar_ready_format(points, plots, project_info):
         
         ar_data["plots"].append(plot_data)
     
-    return json.dumps(ar_data, indent=2)
+    return json.dumps(ar_data, separators=(',', ':'), ensure_ascii=False)
 
 # ═══════════════════════════════════════════════════════════════
 # FEATURE 4: ENHANCED ANALYTICS
@@ -346,6 +497,11 @@ def export_ar_ready_format(points, plots, project_info):
 def generate_comprehensive_report(points, plots, price_per_perch, project_name):
     """
     Generate comprehensive analytics report
+    
+    All plots are measured in one batch and the summary, per-plot analysis and
+    variance read the same arrays; the boundary density analysis is computed
+    once and shared with the confidence score. Plots that can't be measured are
+    listed under "failures" and left out of the totals.
     """
     report = {
         "project": project_name,
@@ -353,37 +509,16 @@ def generate_comprehensive_report(points, plots, price_per_perch, project_name):
         "summary": {},
         "quality_metrics": {},
         "plots_analysis": [],
+        "failures": [],
         "recommendations": []
     }
     
-    # Calculate totals
-    total_area = 0
-    total_perimeter = 0
-    plot_areas = []
+    metrics = batch_metrics(plots)
+    measured = np.flatnonzero(~np.isnan(metrics.area_perch))
+    plot_areas = metrics.area_perch[measured]
+    total_area = float(plot_areas.sum())
     
-    for coords in [p['coords'] for p in plots]:
-        try:
-            from shapely.geometry import Polygon
-            poly = Polygon(coords)
-            area_m2 = poly.area * (111319.9 ** 2) * abs(np.cos(np.radians(coords[0][0])))
-            area = area_m2 / 25.29
-            
-            perimeter = 0
-            for i in range(len(coords)):
-                c1, c2 = coords[i], coords[(i+1) % len(coords)]
-                # Distance calculation
-                lat1, lon1 = np.radians(c1[0]), np.radians(c1[1])
-                lat2, lon2 = np.radians(c2[0]), np.radians(c2[1])
-                dlat, dlon = lat2 - lat1, lon2 - lon1
-                a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
-                dist = 2 * 6371000 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-                perimeter += dist
-            
-            total_area += area
-            total_perimeter += perimeter
-            plot_areas.append(area)
-        except:
-            pass
+    report["failures"] = [{"plot": i + 1, "error": reason} for i, reason in sorted(metrics.errors.items())]
     
     # Summary
     report["summary"] = {
@@ -391,27 +526,43 @@ def generate_comprehensive_report(points, plots, price_per_perch, project_name):
         "total_area_sqm": round(total_area * 25.29, 2),
         "total_area_acres": round(total_area / 160, 3),
         "total_value": round(total_area * price_per_perch, 2),
+        "total_perimeter_m": round(float(metrics.perimeter[measured].sum()), 1),
         "number_of_plots": len(plots),
-        "average_plot_size": round(total_area / len(plots), 2) if plots else 0
+        "average_plot_size": round(total_area / len(measured), 2) if len(measured) else 0
     }
     
-    # Quality metrics
+    report["plots_analysis"] = [
+        {
+            "plot": int(i) + 1,
+            "area_perch": round(area, 2),
+            "area_sqm": round(area_m2, 2),
+            "perimeter_m": round(perimeter, 1),
+            "value": round(area * price_per_perch, 2),
+            "is_remainder": bool(plots[i].get('is_remainder', False)),
+            "valid_geometry": bool(valid)
+        }
+        for i, area, area_m2, perimeter, valid in zip(
+            measured.tolist(), plot_areas.tolist(), metrics.area_m2[measured].tolist(),
+            metrics.perimeter[measured].tolist(), metrics.is_valid[measured].tolist())
+    ]
+    
+    # Quality metrics (one density pass, shared by the confidence estimate)
     quality, suggestions = calculate_point_density_quality(points)
     confidence = estimate_irregular_area_confidence(points, plots)
+    gaps = analyze_point_density(points).gaps if len(points) >= 3 else ()
     
     report["quality_metrics"] = {
         "boundary_points": len(points),
         "point_density_score": round(quality, 1),
         "measurement_confidence": round(confidence, 1),
-        "data_quality": "Excellent" if confidence > 85 else "Good" if confidence > 70 else "Fair"
+        "data_quality": "Excellent" if confidence > 85 else "Good" if confidence > 70 else "Fair",
+        "gap_runs": [{"segments": [g.first + 1, g.last + 1], "length_m": round(g.length_m, 1)} for g in gaps]
     }
     
     # Plot variance
-    if plot_areas:
-        variance = np.var(plot_areas)
-        std_dev = np.std(plot_areas)
-        report["quality_metrics"]["plot_variance"] = round(variance, 3)
-        report["quality_metrics"]["plot_std_dev"] = round(std_dev, 3)
+    if len(plot_areas):
+        report["quality_metrics"]["plot_variance"] = round(float(plot_areas.var()), 3)
+        report["quality_metrics"]["plot_std_dev"] = round(float(plot_areas.std()), 3)
     
     # Recommendations
     if quality < 70:
@@ -420,6 +571,8 @@ def generate_comprehensive_report(points, plots, price_per_perch, project_name):
         report["recommendations"].append("Verify measurements with additional survey")
     if len(points) < 10 and total_area > 100:
         report["recommendations"].append("Large area - consider adding more boundary points")
+    if report["failures"]:
+        report["recommendations"].append(f"{len(report['failures'])} plot(s) could not be measured - check their boundaries")
     
     return report
 
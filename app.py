@@ -2,14 +2,28 @@ import streamlit as st
 import folium
 from streamlit_folium import st_folium
 from folium.plugins import LocateControl, Fullscreen, MeasureControl, Draw, Realtime
-from shapely.geometry import Polygon, MultiPolygon, box, LineString, Point as ShapelyPoint
-from shapely.ops import split as shapely_split
-import math
 import numpy as np
 from datetime import datetime
-import json
+import os
+import tempfile
 import time
 
+from lankaland.corners import CornerStream
+from lankaland.exporters import EXPORT_FORMATS, file_stem, write_export, write_shapefile_zip
+from lankaland.geodesy import initial_bearing
+from lankaland.geometry_cache import batch_metrics, plot_metrics
+from lankaland.gps_ingest import Fix, GpsIngestor, fixes_from_file
+from lankaland.importers import EXTENSIONS, format_for, load_boundaries
+from lankaland.live_tracker import LiveRingTracker
+from lankaland.lod import LodCache, boundary_view
+from lankaland.project_store import ProjectStore
+from lankaland.result_cache import shared_cache as subdivision_cache
+from lankaland.rings import PlotSet, Ring
+from lankaland.subdivision import boundary_polygon, edge_bearing
+from lankaland.subdivision_jobs import SubdivisionJob
+from lankaland.sweep import accuracy_grade, sweep_grid, sweep_layouts
+from map_layers import MapLayerManager, draw_boundary, draw_plots, draw_walk_path
+
 # === PAGE CONFIG ===
 st.set_page_config(
     page_title="LankaLand Pro GIS | Ultimate Edition",
@@ -345,8 +359,8 @@ st.markdown("""
 defaults = {
     'lang': None,
     'method': None,
-    'points': [],
-    'final_plots': [],
+    'points': Ring(),
+    'final_plots': PlotSet(),
     'orientation': 'vertical',
     'subdivision_mode': 'by_area',
     'target_area': 10.0,
@@ -364,7 +378,7 @@ defaults = {
     'surveyor_name': '',
     'survey_date': datetime.now().strftime('%Y-%m-%d'),
     # NEW: GPS Walking Features
-    'gps_path': [],  # Walking path points
+    'gps_path': Ring(),  # Walking path points
     'gps_accuracy': 100,  # Current GPS accuracy (0-100)
     'current_heading': 0,  # Compass direction
     'walking_speed': 0.0,  # m/s
@@ -374,44 +388,48 @@ defaults = {
     'corner_threshold': 30,  # Degrees change to detect corner
     'gps_alerts': [],  # Alert messages
     'walking_mode': False,  # Active walking mode
+    'gps_ingestor': GpsIngestor(),  # filters/dedups fixes into gps_path
+    'gps_log_id': None,  # last uploaded GPS log already ingested
+    'corner_stream': CornerStream(),  # corner detection over gps_path as it grows
+    # Incremental live stats for points / gps_path
+    'points_tracker': LiveRingTracker(),
+    'path_tracker': LiveRingTracker(),
+    # Map rendering
+    'map_layers': MapLayerManager(),
+    'last_click': None,  # last map click already handled
+    'map_zoom': 19,  # last zoom reported by the map, picks the level of detail
+    'lod_cache': LodCache(),
+    # Background subdivision
+    'subdivision_job': None,  # SubdivisionJob while one is running
+    'subdivision_errors': [],
+    'sweep_results': [],  # top layouts from the last parameter sweep
+    'project_id': None,  # row in the project store once saved
+    'export_file': None,  # (plots, path, file name, mime) of the last prepared export
+    # Bulk import
+    'imported_boundaries': PlotSet(),  # boundaries read from the last imported file
+    'imported_areas': [],  # perches per imported boundary
+    'import_file_id': None,  # last uploaded boundary file already read
+    'import_errors': [],
 }
 
 for key, value in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = value
 
-# === CALCULATIONS (UNCHANGED) ===
-def get_distance_meters(p1, p2):
-    try:
-        R = 6371000
-        lat1, lon1 = math.radians(p1[0]), math.radians(p1[1])
-        lat2, lon2 = math.radians(p2[0]), math.radians(p2[1])
-        dlat, dlon = lat2 - lat1, lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    except:
-        return 0.0
-
-def calculate_area(coords):
-    if len(coords) < 3:
-        return 0.0, 0.0
-    try:
-        poly = Polygon(coords)
-        if not poly.is_valid:
-            poly = poly.buffer(0)
-        avg_lat = math.radians(sum(c[0] for c in coords) / len(coords))
-        area_m2 = poly.area * (111319.9 ** 2) * abs(math.cos(avg_lat))
-        perimeter = sum(get_distance_meters(coords[i], coords[(i+1)%len(coords)]) 
-                       for i in range(len(coords)))
-        return area_m2 / 25.29, perimeter
-    except:
-        return 0.0, 0.0
+# === CALCULATIONS ===
+def sync_live_stats():
+    """Bring the incremental trackers up to date with points and gps_path (O(1) per append/undo)"""
+    # Points and paths are kept array-backed, whatever was assigned to them
+    for key in ('points', 'gps_path'):
+        if not isinstance(st.session_state[key], Ring):
+            st.session_state[key] = Ring(st.session_state[key])
+    st.session_state.points_tracker.sync(st.session_state.points)
+    st.session_state.path_tracker.sync(st.session_state.gps_path)
+    st.session_state.distance_walked = st.session_state.path_tracker.path_length
 
 def calculate_center(coords):
     try:
-        poly = Polygon(coords)
-        c = poly.centroid
-        return (c.y, c.x)
+        return plot_metrics(coords).centroid
     except:
         return (coords[0][0], coords[0][1]) if coords else (0, 0)
 
@@ -423,56 +441,24 @@ def format_currency(amount):
     else:
         return f"රු. {amount:,.2f}"
 
+BADGE_HTML = {
+    "PERFECT": "<span class='badge badge-perfect'>✓ PERFECT</span>",
+    "GOOD": "<span class='badge badge-good'>✓ GOOD</span>",
+    "FAIR": "<span class='badge badge-fair'>! FAIR</span>",
+    "POOR": "<span class='badge badge-poor'>✗ POOR</span>",
+}
+
 def get_accuracy_badge(actual, target):
-    if target == 0:
-        return ""
-    diff_pct = abs(actual - target) / target * 100
-    if diff_pct < 0.5:
-        return "<span class='badge badge-perfect'>✓ PERFECT</span>"
-    elif diff_pct < 2:
-        return "<span class='badge badge-good'>✓ GOOD</span>"
-    elif diff_pct < 5:
-        return "<span class='badge badge-fair'>! FAIR</span>"
-    else:
-        return "<span class='badge badge-poor'>✗ POOR</span>"
+    return BADGE_HTML.get(accuracy_grade(actual, target), "")
 
 # === NEW: GPS HELPER FUNCTIONS ===
 def calculate_bearing(p1, p2):
     """Calculate compass bearing between two points"""
     try:
-        lat1, lon1 = math.radians(p1[0]), math.radians(p1[1])
-        lat2, lon2 = math.radians(p2[0]), math.radians(p2[1])
-        dlon = lon2 - lon1
-        x = math.sin(dlon) * math.cos(lat2)
-        y = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-        bearing = math.degrees(math.atan2(x, y))
-        return (bearing + 360) % 360
+        return initial_bearing(p1, p2)
     except:
         return 0.0
 
-def detect_corner(path, threshold=30):
-    """Detect if user is turning a corner based on direction change"""
-    if len(path) < 3:
-        return False
-    
-    try:
-        # Get last 3 points
-        p1, p2, p3 = path[-3], path[-2], path[-1]
-        
-        # Calculate bearings
-        bearing1 = calculate_bearing(p1, p2)
-        bearing2 = calculate_bearing(p2, p3)
-        
-        # Calculate angle change
-        angle_change = abs(bearing2 - bearing1)
-        if angle_change > 180:
-            angle_change = 360 - angle_change
-        
-        # If angle change is significant, it's a corner
-        return angle_change > threshold
-    except:
-        return False
-
 def get_gps_quality_status(accuracy):
     """Get GPS quality status based on accuracy value"""
     if accuracy >= 90:
@@ -484,25 +470,196 @@ def get_gps_quality_status(accuracy):
     else:
         return "poor", "🔴 Poor", "#ff5722"
 
-def calculate_walking_speed(path, time_window=5):
-    """Calculate current walking speed"""
-    if len(path) < 2:
-        return 0.0
+def reset_walk():
+    """Start a new walking path (fresh GPS filter and corner detector)"""
+    st.session_state.gps_path = Ring()
+    st.session_state.gps_ingestor.reset()
+    st.session_state.corner_stream.reset(st.session_state.gps_path)
+
+def add_corners(indices):
+    """Mark gps_path[i] for each detected corner index as a boundary point; returns how many were new"""
+    path, points = st.session_state.gps_path, st.session_state.points
+    tracker = st.session_state.points_tracker
+    added = 0
+    for i in indices:
+        pt = path[i]
+        if pt not in tracker:
+            points.append(pt)
+            tracker.append(pt)
+            added += 1
+    return added
+
+def ingest_fixes(fixes):
+    """Feed a batch of timestamped fixes through the GPS pipeline into gps_path, auto-marking corners"""
+    ingestor, stream = st.session_state.gps_ingestor, st.session_state.corner_stream
+    path = st.session_state.gps_path
+    if stream.path is not path or len(stream) != len(path):
+        # gps_path was replaced or edited outside the pipeline; re-seed without re-marking old corners
+        stream.reset(path)
+        stream.update()
+    
+    accepted = ingestor.ingest(fixes)
+    stream.threshold = st.session_state.corner_threshold
+    found = stream.extend(accepted)  # appends to gps_path
+    corners = add_corners(found) if st.session_state.auto_corner_detect else 0
+    if accepted and st.session_state.project_id is not None:
+        autosave_walk()
+    
+    st.session_state.walking_speed = ingestor.speed
+    if ingestor.last_accuracy_m is not None:
+        st.session_state.gps_accuracy = max(0, 100 - round(ingestor.last_accuracy_m))
+    return corners
+
+def finish_walk():
+    """End the walk: corners still waiting for look-ahead points are decided on the path as it stands"""
+    st.session_state.walking_mode = False
+    found = st.session_state.corner_stream.finish()
+    return add_corners(found) if st.session_state.auto_corner_detect else 0
+
+# === BACKGROUND SUBDIVISION ===
+def start_subdivision(mode):
+    """Cancel any running job and start a new one for the current boundary and settings"""
+    if st.session_state.subdivision_job is not None:
+        st.session_state.subdivision_job.cancel()
+    
+    poly = boundary_polygon(st.session_state.points)
+    value = {"by_area": st.session_state.target_area,
+             "by_count": st.session_state.target_count,
+             "by_width": st.session_state.target_width}[mode]
+    
+    st.session_state.subdivision_errors = []
+    job = SubdivisionJob(poly, mode, value, st.session_state.orientation)
+    if job.from_cache:
+        # Same parcel and settings were already run in this or another session
+        st.session_state.final_plots = PlotSet(job.result())
+        st.session_state.subdivision_job = None
+        st.toast("⚡ Loaded from cache")
+    else:
+        st.session_state.final_plots = PlotSet()
+        st.session_state.subdivision_job = job
+
+@st.fragment(run_every=1.0)
+def subdivision_progress():
+    """Polls the running job: progress bar, cancel, and a full rerun whenever new plots are cut"""
+    job = st.session_state.subdivision_job
+    if job is None:
+        return
+    
+    st.markdown("<div class='surveyor-animation'>🚶‍♂️📏</div>", unsafe_allow_html=True)
+    st.markdown(f"<div class='progress-bar'><div class='progress-fill' style='width:{job.progress*100:.0f}%'></div></div>", unsafe_allow_html=True)
+    if st.button("✖ Cancel", use_container_width=True, disabled=job.cancelled):
+        job.cancel()
+    
+    if job.done:
+        st.session_state.final_plots = PlotSet(job.result())
+        st.session_state.subdivision_errors = job.errors
+        st.session_state.subdivision_job = None
+        st.rerun()
+    elif len(job.plots) != len(st.session_state.final_plots):
+        # Show plots on the map as they are cut
+        st.session_state.final_plots = PlotSet(job.plots)
+        st.rerun()
+
+# === PROJECT STORE ===
+# Settings saved with a project (geometry is stored separately)
+PROJECT_SETTINGS = ('method', 'orientation', 'subdivision_mode', 'target_area', 'target_count',
+                    'target_width', 'price_per_perch', 'corner_threshold')
+
+@st.cache_resource
+def get_project_store():
+    """One SQLite-backed store shared by every session"""
+    return ProjectStore()
+
+def boundary_area_perch():
+    """Area of the boundary walked so far (0 until it has 3 points)"""
+    return st.session_state.points_tracker.area_perch if len(st.session_state.points) >= 3 else 0.0
+
+def save_project():
+    """Persist the current project, creating it on the first save; returns its id"""
+    store = get_project_store()
+    if st.session_state.project_id is None:
+        st.session_state.project_id = store.create_project(st.session_state.project_name)
+    store.save_project(st.session_state.project_id, st.session_state.project_name,
+                       points=st.session_state.points, gps_path=st.session_state.gps_path,
+                       plots=st.session_state.final_plots, area_perch=boundary_area_perch(),
+                       surveyor=st.session_state.surveyor_name, survey_date=st.session_state.survey_date,
+                       settings={k: st.session_state[k] for k in PROJECT_SETTINGS})
+    return st.session_state.project_id
+
+def autosave_walk():
+    """Append the newly walked points to the saved project"""
+    get_project_store().append_walk(st.session_state.project_id, st.session_state.points, st.session_state.gps_path,
+                                    boundary_area_perch())
+
+def open_project(project_id):
+    """Replace the session's project with a saved one"""
+    project = get_project_store().load_project(project_id)
+    if st.session_state.subdivision_job is not None:
+        st.session_state.subdivision_job.cancel()
+    reset_walk()
+    st.session_state.update({k: project[k] for k in PROJECT_SETTINGS if k in project})
+    st.session_state.update({
+        'project_id': project_id,
+        'project_name': project['name'],
+        'surveyor_name': project['surveyor'],
+        'survey_date': project['survey_date'] or st.session_state.survey_date,
+        'points': project['points'],
+        'gps_path': project['gps_path'],
+        'final_plots': project['final_plots'],
+        'method': project.get('method') or 'manual',
+        'walking_mode': False,
+        'subdivision_job': None,
+        'subdivision_errors': [],
+        'sweep_results': [],
+    })
+
+# === EXPORT ===
+def prepare_export(fmt):
+    """Stream the current plots into a temporary file in `fmt` (an EXPORT_FORMATS key or 'shapefile')"""
+    previous = st.session_state.export_file
+    if previous is not None and os.path.exists(previous[1]):
+        os.remove(previous[1])
     
+    plots = st.session_state.final_plots
+    name = st.session_state.project_name
+    if fmt == 'shapefile':
+        suffix, mime = '.zip', 'application/zip'
+        with tempfile.NamedTemporaryFile('wb', suffix=suffix, delete=False) as f:
+            write_shapefile_zip(f, plots, name=name)
+    else:
+        _, mime, suffix = EXPORT_FORMATS[fmt]
+        options = {} if fmt == 'csv' else {'boundary': st.session_state.points}
+        if fmt in ('geojson', 'kml'):
+            options['name'] = name
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix=suffix, delete=False) as f:
+            write_export(fmt, f, plots, **options)
+    st.session_state.export_file = (plots, f.name, file_stem(name) + suffix, mime)
+
+# === IMPORT ===
+def import_boundaries(uploaded):
+    """Read every boundary in an uploaded GeoJSON / KML / GPX / CSV file, repaired with buffer(0)"""
+    errors = []
     try:
-        # Use last few points
-        recent_points = path[-min(time_window, len(path)):]
-        if len(recent_points) < 2:
-            return 0.0
-        
-        total_dist = sum(get_distance_meters(recent_points[i], recent_points[i+1]) 
-                        for i in range(len(recent_points)-1))
-        
-        # Assume 1 second between points (adjust based on actual timing)
-        time_elapsed = len(recent_points) - 1
-        return total_dist / time_elapsed if time_elapsed > 0 else 0.0
-    except:
-        return 0.0
+        boundaries = load_boundaries(uploaded, format_for(uploaded.name), error_callback=errors.append)
+    except (ValueError, KeyError, SyntaxError) as e:  # ET.ParseError is a SyntaxError
+        boundaries = PlotSet()
+        errors.append(f"Could not read {uploaded.name}: {e}")
+    st.session_state.imported_boundaries = boundaries
+    st.session_state.imported_areas = batch_metrics(boundaries).area_perch.tolist() if len(boundaries) else []
+    st.session_state.import_errors = errors
+
+def use_imported_boundary(index):
+    """Make imported boundary `index` the current boundary"""
+    if st.session_state.subdivision_job is not None:
+        st.session_state.subdivision_job.cancel()
+    reset_walk()
+    st.session_state.update({
+        'points': Ring(st.session_state.imported_boundaries.ring(index)),
+        'final_plots': PlotSet(),
+        'method': st.session_state.method or 'manual',
+        'walking_mode': False,
+        'subdivision_job': None,
+    })
 
 def get_compass_emoji(bearing):
     """Get compass direction emoji based on bearing"""
@@ -524,169 +681,6 @@ def get_compass_emoji(bearing):
     
     return closest
 
-# === SUBDIVISION ALGORITHM (UNCHANGED) ===
-def iterative_equal_area_subdivision(main_polygon, target_area_perch, orientation="vertical", progress_callback=None):
-    """Fixed iterative subdivision algorithm"""
-    try:
-        plots = []
-        remaining = main_polygon
-        min_lat, min_lon, max_lat, max_lon = main_polygon.bounds
-        
-        total_area, _ = calculate_area(list(main_polygon.exterior.coords))
-        expected_plots = int(total_area / target_area_perch)
-        
-        if expected_plots == 0:
-            return []
-        
-        plot_num = 0
-        max_plots = expected_plots + 2
-        
-        while plot_num < max_plots and not remaining.is_empty:
-            if progress_callback:
-                progress_callback(plot_num, expected_plots)
-            
-            remaining_area, _ = calculate_area(list(remaining.exterior.coords))
-            
-            if remaining_area < 0.5:
-                break
-            
-            if remaining_area < target_area_perch * 1.3:
-                plots.append({
-                    'coords': list(remaining.exterior.coords),
-                    'plot_number': plot_num + 1,
-                    'is_remainder': True
-                })
-                break
-            
-            if orientation == "vertical":
-                left, right = min_lon, max_lon
-            else:
-                left, right = min_lat, max_lat
-            
-            best_piece = None
-            iterations = 0
-            max_iter = 60
-            
-            while iterations < max_iter:
-                mid = (left + right) / 2
-                
-                try:
-                    if orientation == "vertical":
-                        cut_box = box(min_lat - 0.1, min_lon - 0.1, max_lat + 0.1, mid)
-                    else:
-                        cut_box = box(min_lat - 0.1, min_lon - 0.1, mid, max_lon + 0.1)
-                    
-                    piece = remaining.intersection(cut_box)
-                    
-                    if piece.is_empty:
-                        if orientation == "vertical":
-                            left = mid
-                        else:
-                            left = mid
-                        iterations += 1
-                        continue
-                    
-                    if isinstance(piece, MultiPolygon):
-                        piece = max(piece.geoms, key=lambda p: p.area)
-                    
-                    if not isinstance(piece, Polygon):
-                        break
-                    
-                    piece_coords = list(piece.exterior.coords)
-                    piece_area, _ = calculate_area(piece_coords)
-                    
-                    diff = piece_area - target_area_perch
-                    
-                    if abs(diff) < 0.1:
-                        best_piece = piece
-                        break
-                    elif diff > 0:
-                        if orientation == "vertical":
-                            right = mid
-                        else:
-                            right = mid
-                    else:
-                        if orientation == "vertical":
-                            left = mid
-                        else:
-                            left = mid
-                    
-                except Exception as e:
-                    break
-                
-                iterations += 1
-            
-            if best_piece and isinstance(best_piece, Polygon):
-                plots.append({
-                    'coords': list(best_piece.exterior.coords),
-                    'plot_number': plot_num + 1,
-                    'is_remainder': False
-                })
-                
-                try:
-                    if orientation == "vertical":
-                        remaining_box = box(min_lat - 0.1, mid, max_lat + 0.1, max_lon + 0.1)
-                    else:
-                        remaining_box = box(mid, min_lon - 0.1, max_lat + 0.1, max_lon + 0.1)
-                    
-                    remaining = remaining.intersection(remaining_box)
-                    
-                    if isinstance(remaining, MultiPolygon):
-                        remaining = max(remaining.geoms, key=lambda p: p.area)
-                    
-                    if not isinstance(remaining, Polygon) or remaining.is_empty:
-                        break
-                    
-                    min_lat, min_lon, max_lat, max_lon = remaining.bounds
-                    
-                except Exception as e:
-                    break
-            else:
-                break
-            
-            plot_num += 1
-        
-        if not remaining.is_empty and isinstance(remaining, Polygon):
-            remaining_coords = list(remaining.exterior.coords)
-            remaining_area, _ = calculate_area(remaining_coords)
-            if remaining_area > 0.3:
-                plots.append({
-                    'coords': remaining_coords,
-                    'plot_number': len(plots) + 1,
-                    'is_remainder': True
-                })
-        
-        return plots
-        
-    except Exception as e:
-        st.error(f"Subdivision error: {e}")
-        return []
-
-def subdivide_by_count(main_polygon, count, orientation="vertical"):
-    """කැබලි ගණන අනුව බෙදීම"""
-    try:
-        total_area, _ = calculate_area(list(main_polygon.exterior.coords))
-        target_area = total_area / count
-        return iterative_equal_area_subdivision(main_polygon, target_area, orientation)
-    except:
-        return []
-
-def subdivide_by_width(main_polygon, width_m, orientation="vertical"):
-    """Width අනුව බෙදීම"""
-    try:
-        total_area, perimeter = calculate_area(list(main_polygon.exterior.coords))
-        if orientation == "vertical":
-            min_lat, min_lon, max_lat, max_lon = main_polygon.bounds
-            total_width = get_distance_meters((min_lat, min_lon), (min_lat, max_lon))
-        else:
-            min_lat, min_lon, max_lat, max_lon = main_polygon.bounds
-            total_width = get_distance_meters((min_lat, min_lon), (max_lat, min_lon))
-        
-        count = max(1, int(total_width / width_m))
-        return subdivide_by_count(main_polygon, count, orientation)
-    except:
-        return []
-
 # === LANGUAGE (EXPANDED) ===
 texts = {
     "si": {
@@ -701,6 +695,7 @@ texts = {
         "by_area": "වර්ගඵලයෙන්",
         "by_count": "ගණනින්",
         "by_width": "පළලින්",
+        "cut_angle": "කැපුම් කෝණය",
         "target_area": "ඉලක්ක වර්ගඵලය (P)",
         "plot_count": "කැබලි ගණන",
         "plot_width": "පළල (m)",
@@ -737,6 +732,7 @@ texts = {
         "by_area": "By Area",
         "by_count": "By Count",
         "by_width": "By Width",
+        "cut_angle": "Cut Angle",
         "target_area": "Target Area (P)",
         "plot_count": "Plot Count",
         "plot_width": "Width (m)",
@@ -784,13 +780,16 @@ if st.session_state.lang is None:
 
 else:
     T = texts[st.session_state.lang]
+    sync_live_stats()
+    live = st.session_state.points_tracker
     
     # Sidebar
     with st.sidebar:
         st.markdown("### ⚙️ Settings")
         
         if st.button("🔙 Main Menu", use_container_width=True):
-            st.session_state.update({"method": None, "points": [], "final_plots": [], "gps_path": [], "walking_mode": False})
+            st.session_state.update({"method": None, "points": Ring(), "final_plots": PlotSet(), "walking_mode": False, "project_id": None})
+            reset_walk()
             st.rerun()
         
         st.markdown("---")
@@ -798,19 +797,48 @@ else:
         st.session_state.project_name = st.text_input("Project Name", st.session_state.project_name)
         st.session_state.price_per_perch = st.number_input(T['price'], min_value=0.0, value=st.session_state.price_per_perch, step=10000.0)
         
+        with st.expander("📂 Projects"):
+            # Only the summary rows are read here; geometry loads when a project is opened
+            store = get_project_store()
+            search = st.text_input("Search", key="project_search")
+            projects = store.list_projects(search, limit=50)
+            if projects:
+                chosen = st.selectbox("Saved projects", projects, format_func=lambda p: f"{p.name} · {p.n_points} pts · {p.area_perch:.1f} P · {p.updated_at[:10]}")
+                if st.button("Open", use_container_width=True):
+                    open_project(chosen.id)
+                    st.rerun()
+            st.caption(f"{store.count_projects()} saved projects")
+        
+        with st.expander("📥 Import Boundaries"):
+            uploaded = st.file_uploader("GeoJSON / KML / GPX / CSV", type=sorted(e.lstrip('.') for e in EXTENSIONS), key="boundary_file")
+            if uploaded is not None and uploaded.file_id != st.session_state.import_file_id:
+                st.session_state.import_file_id = uploaded.file_id
+                import_boundaries(uploaded)
+            imported = st.session_state.imported_boundaries
+            if len(imported):
+                areas = st.session_state.imported_areas
+                chosen = st.selectbox(f"{len(imported)} boundaries", range(len(imported)),
+                                      format_func=lambda i: f"{imported[i]['name']} · {areas[i]:.1f} P" + (" · repaired" if imported[i]['repaired'] else ""))
+                if st.button("Use as boundary", use_container_width=True):
+                    use_imported_boundary(chosen)
+                    st.rerun()
+            for message in st.session_state.import_errors[:5]:
+                st.caption(f"⚠️ {message}")
+            if len(st.session_state.import_errors) > 5:
+                st.caption(f"… and {len(st.session_state.import_errors) - 5} more")
+        
         st.markdown("---")
         st.markdown("### 📊 Live Stats")
         
         if st.session_state.points:
             st.metric("Points", len(st.session_state.points))
             if len(st.session_state.points) >= 3:
-                area, peri = calculate_area(st.session_state.points)
-                st.metric(T['total_area'], f"{area:.2f} P")
-                st.metric(T['perimeter'], f"{peri:.1f} m")
+                st.metric(T['total_area'], f"{live.area_perch:.2f} P")
+                st.metric(T['perimeter'], f"{live.perimeter:.1f} m")
         
         if st.session_state.final_plots:
             st.metric("Plots", len(st.session_state.final_plots))
-            total = sum(calculate_area(p['coords'])[0] for p in st.session_state.final_plots)
+            total = sum(plot_metrics(p['coords']).area_perch for p in st.session_state.final_plots)
             st.metric("Allocated", f"{total:.2f} P")
         
         # NEW: GPS Stats
@@ -849,13 +877,15 @@ else:
                     st.rerun()
         with col3:
             if st.button(T['reset'], use_container_width=True):
-                st.session_state.points = []
-                st.session_state.final_plots = []
-                st.session_state.gps_path = []
-                st.session_state.walking_mode = False
+                st.session_state.points = Ring()
+                st.session_state.final_plots = PlotSet()
+                reset_walk()
+                # A new walk starts a new project; autosave must not overwrite the saved one
+                st.session_state.update({"walking_mode": False, "project_id": None})
                 st.rerun()
         with col4:
             if st.button(T['save'], use_container_width=True):
+                save_project()
                 st.success("Saved!")
         with col5:
             if st.button("📸 Screenshot", use_container_width=True):
@@ -874,8 +904,9 @@ else:
             else:
                 center = [7.8731, 80.7718]
             
-            # Create map
-            m = folium.Map(location=center, zoom_start=19,
+            # Base map never changes, so st_folium keeps it mounted between reruns;
+            # the data layers go in separately, each re-serialized only when its content hash changes
+            m = folium.Map(location=[7.8731, 80.7718], zoom_start=19,
                           tiles="https://mt1.google.com/vt/lyrs=y&x={x}&y={y}&z={z}",
                           attr="Google Satellite")
             
@@ -884,84 +915,40 @@ else:
             Fullscreen().add_to(m)
             MeasureControl().add_to(m)
             
-            # Draw GPS walking path
-            if st.session_state.gps_path and len(st.session_state.gps_path) > 1:
-                folium.PolyLine(
-                    st.session_state.gps_path,
-                    color='#00BCD4',
-                    weight=3,
-                    opacity=0.7,
-                    popup="Walking Path"
-                ).add_to(m)
-            
-            # Draw plots
-            colors = ['#4CAF50', '#2196F3', '#FF9800', '#E91E63', '#9C27B0', 
-                     '#00BCD4', '#FFEB3B', '#795548', '#FF5722', '#607D8B']
-            
-            for idx, plot in enumerate(st.session_state.final_plots):
-                color = colors[idx % len(colors)]
-                area, peri = calculate_area(plot['coords'])
-                is_rem = plot.get('is_remainder', False)
-                
-                folium.Polygon(
-                    locations=plot['coords'],
-                    color=color,
-                    weight=3,
-                    fill=True,
-                    fill_opacity=0.5,
-                    popup=f"<b>Plot #{idx+1}</b><br>Area: {area:.2f} P<br>{'[Remainder]' if is_rem else ''}"
-                ).add_to(m)
-                
-                center_pt = calculate_center(plot['coords'])
-                folium.Marker(
-                    center_pt,
-                    icon=folium.DivIcon(html=f'<div style="font-size:16pt;font-weight:900;color:white;background:{color};padding:8px;border-radius:50%;width:40px;height:40px;text-align:center;line-height:40px;border:3px solid white;">{idx+1}</div>')
-                ).add_to(m)
-            
-            # Draw boundary
-            if len(st.session_state.points) >= 2:
-                folium.Polygon(
-                    locations=st.session_state.points,
-                    color="yellow",
-                    weight=5,
-                    fill=False,
-                    dashArray="10, 10"
-                ).add_to(m)
-                
-                for i in range(len(st.session_state.points)):
-                    p1, p2 = st.session_state.points[i], st.session_state.points[(i+1)%len(st.session_state.points)]
-                    mid = [(p1[0]+p2[0])/2, (p1[1]+p2[1])/2]
-                    dist = get_distance_meters(p1, p2)
-                    folium.Marker(mid, icon=folium.DivIcon(html=f'<div style="background:black;color:white;padding:5px;border-radius:5px;font-weight:bold;">{dist:.1f}m</div>')).add_to(m)
+            # Long paths/boundaries are drawn at the level of detail for the current zoom
+            layers = st.session_state.map_layers
+            lods = st.session_state.lod_cache
+            zoom = st.session_state.map_zoom
+            walk_lod = lods.get("walk_path", st.session_state.gps_path)
+            boundary_lod = lods.get("boundary", st.session_state.points, closed=True)
+            feature_groups = [
+                layers.layer("walk_path", walk_lod.at(zoom), draw_walk_path),
+                layers.layer("plots", st.session_state.final_plots, draw_plots),
+                layers.layer("boundary", boundary_view(boundary_lod, zoom), draw_boundary),
+            ]
             
-            # Draw points
-            for i, p in enumerate(st.session_state.points):
-                folium.Marker(location=p, draggable=True, icon=folium.Icon(color="green"), popup=f"Point {i+1}").add_to(m)
+            map_data = st_folium(m, height=650, width="100%", key="main_map",
+                                 center=center, feature_group_to_add=feature_groups)
             
-            map_data = st_folium(m, height=650, width="100%", key="main_map")
+            if map_data and map_data.get('zoom') and map_data['zoom'] != st.session_state.map_zoom:
+                st.session_state.map_zoom = map_data['zoom']
+                if walk_lod.level_for(st.session_state.map_zoom) != walk_lod.level_for(zoom):
+                    st.rerun()
             
-            if map_data and map_data.get('last_clicked'):
+            # The mounted map keeps reporting its last click, so only act on new ones
+            if map_data and map_data.get('last_clicked') and map_data['last_clicked'] != st.session_state.last_click:
+                st.session_state.last_click = map_data['last_clicked']
                 new_pt = (map_data['last_clicked']['lat'], map_data['last_clicked']['lng'])
                 
                 if st.session_state.method == "manual":
-                    if new_pt not in st.session_state.points:
+                    if new_pt not in live:
                         st.session_state.points.append(new_pt)
                         st.rerun()
                 
                 elif st.session_state.method == "gps" and st.session_state.walking_mode:
-                    # Add to walking path
-                    st.session_state.gps_path.append(new_pt)
-                    
-                    # Calculate distance
-                    if len(st.session_state.gps_path) > 1:
-                        dist = get_distance_meters(st.session_state.gps_path[-2], st.session_state.gps_path[-1])
-                        st.session_state.distance_walked += dist
-                    
-                    # Auto corner detection
-                    if st.session_state.auto_corner_detect and detect_corner(st.session_state.gps_path, st.session_state.corner_threshold):
-                        if new_pt not in st.session_state.points:
-                            st.session_state.points.append(new_pt)
-                            st.toast(f"🎯 {T['corner_detected']}")
+                    # Through the GPS pipeline like any other fix (distance_walked follows via path_tracker)
+                    if ingest_fixes([Fix(time.time(), new_pt[0], new_pt[1])]):
+                        st.toast(f"🎯 {T['corner_detected']}")
                     
                     st.rerun()
         
@@ -970,7 +957,7 @@ else:
             st.markdown(f"<div class='card'><h3>{T['analytics']}</h3>", unsafe_allow_html=True)
             
             if len(st.session_state.points) >= 3:
-                area, peri = calculate_area(st.session_state.points)
+                area = live.area_perch
                 value = area * st.session_state.price_per_perch
                 
                 st.markdown(f"<div class='metric-large'>{area:.2f} P</div>", unsafe_allow_html=True)
@@ -1001,22 +988,33 @@ else:
                     if not st.session_state.walking_mode:
                         if st.button(T['start_walking'], use_container_width=True, type="primary"):
                             st.session_state.walking_mode = True
-                            st.session_state.gps_path = []
+                            reset_walk()
                             st.session_state.distance_walked = 0.0
+                            # The walk is saved as it grows only into a saved or opened project
                             st.rerun()
                     else:
                         if st.button(T['stop_walking'], use_container_width=True):
-                            st.session_state.walking_mode = False
+                            finish_walk()
                             st.rerun()
                 
                 with col2:
                     if st.button(T['mark_corner'], use_container_width=True):
                         if map_data and map_data.get('last_clicked'):
                             new_pt = (map_data['last_clicked']['lat'], map_data['last_clicked']['lng'])
-                            if new_pt not in st.session_state.points:
+                            if new_pt not in live:
                                 st.session_state.points.append(new_pt)
                                 st.rerun()
                 
+                # A recorded log is a complete walk, run through the same pipeline in one pass
+                gps_log = st.file_uploader("📂 GPS Log (NMEA / GPX)", type=["nmea", "txt", "log", "gpx"], key="gps_log")
+                if gps_log is not None and gps_log.file_id != st.session_state.gps_log_id:
+                    st.session_state.gps_log_id = gps_log.file_id
+                    fixes = fixes_from_file(gps_log.name, gps_log.getvalue())
+                    reset_walk()
+                    corners = ingest_fixes(fixes) + finish_walk()
+                    st.toast(f"🛰️ {len(fixes)} fixes → {len(st.session_state.gps_path)} path points, {corners} corners")
+                    st.rerun()
+                
                 # Auto detect toggle
                 st.session_state.auto_corner_detect = st.checkbox(
                     T['auto_detect'],
@@ -1066,7 +1064,7 @@ else:
                 # Close boundary button
                 if len(st.session_state.points) >= 3:
                     if st.button(f"✓ {T['close_boundary']}", use_container_width=True):
-                        st.session_state.walking_mode = False
+                        finish_walk()
                         st.success("Boundary completed!")
                         st.rerun()
                 
@@ -1098,39 +1096,79 @@ else:
                     st.session_state.orientation = "horizontal"
                     st.rerun()
                 
-                if st.button(T['execute'], use_container_width=True, type="primary"):
-                    area, _ = calculate_area(st.session_state.points)
-                    
-                    progress = st.empty()
-                    anim = st.empty()
+                # Cuts at any bearing, e.g. square to a road frontage
+                with st.expander(f"📐 {T['cut_angle']}"):
+                    current = st.session_state.orientation
+                    bearing = st.number_input("Bearing (°)", min_value=0.0, max_value=179.9,
+                                              value=0.0 if isinstance(current, str) else float(current), step=5.0)
+                    if st.button("Use Bearing", use_container_width=True):
+                        st.session_state.orientation = bearing
+                        st.rerun()
                     
-                    anim.markdown("<div class='surveyor-animation'>🚶‍♂️📏</div>", unsafe_allow_html=True)
+                    n_pts = len(st.session_state.points)
+                    edge = st.selectbox("Boundary edge", range(n_pts), format_func=lambda i: f"{i+1} → {(i+1) % n_pts + 1}")
+                    c1, c2 = st.columns(2)
+                    if c1.button("∥ Parallel", use_container_width=True):
+                        st.session_state.orientation = round(edge_bearing(st.session_state.points, edge), 2)
+                        st.rerun()
+                    if c2.button("⟂ Square", use_container_width=True):
+                        st.session_state.orientation = round((edge_bearing(st.session_state.points, edge) + 90) % 180, 2)
+                        st.rerun()
+                
+                current = st.session_state.orientation
+                st.caption(f"Cuts: {current}" if isinstance(current, str) else f"Cuts: {current:g}°")
+                
+                if st.button(T['execute'], use_container_width=True, type="primary"):
+                    start_subdivision(mode)
+                    st.rerun()
+                
+                if st.session_state.subdivision_job is not None:
+                    subdivision_progress()
+                
+                for err in st.session_state.subdivision_errors:
+                    st.error(err)
+                
+                if subdivision_cache.hits or subdivision_cache.misses:
+                    st.caption(f"Result cache: {subdivision_cache.hits} hits · {subdivision_cache.misses} misses · {len(subdivision_cache)} stored")
+                
+                with st.expander("🔍 Layout Sweep"):
+                    c1, c2, c3 = st.columns(3)
+                    area_from = c1.number_input("From (P)", min_value=1.0, value=max(1.0, st.session_state.target_area - 5), step=0.5)
+                    area_to = c2.number_input("To (P)", min_value=1.0, value=st.session_state.target_area + 5, step=0.5)
+                    area_step = c3.number_input("Step (P)", min_value=0.1, value=1.0, step=0.5)
+                    angles_text = st.text_input("Extra cut angles (°)", "", placeholder="15, 30, 45")
                     
-                    def update_prog(cur, tot):
-                        pct = (cur/tot)*100
-                        progress.markdown(f"<div class='progress-bar'><div class='progress-fill' style='width:{pct}%'></div></div>", unsafe_allow_html=True)
+                    if st.button("Run Sweep", use_container_width=True):
+                        try:
+                            angles = [float(a) for a in angles_text.replace(",", " ").split()]
+                        except ValueError:
+                            angles = []
+                            st.warning("Cut angles must be numbers")
+                        configs = sweep_grid(target_areas=np.arange(area_from, area_to + 1e-9, area_step), angles=angles)
+                        poly = boundary_polygon(st.session_state.points)
+                        with st.spinner(f"Evaluating {len(configs)} layouts..."):
+                            st.session_state.sweep_results = sweep_layouts(poly, configs)[:10]
                     
-                    try:
-                        poly = Polygon(st.session_state.points)
-                        if not poly.is_valid:
-                            poly = poly.buffer(0)
+                    results = st.session_state.sweep_results
+                    if results:
+                        st.dataframe([{
+                            "Target (P)": layout.config.value,
+                            "Cuts": layout.config.orientation if isinstance(layout.config.orientation, str) else f"{layout.config.orientation:g}°",
+                            "Plots": layout.full_plots,
+                            "Allocated %": round(layout.allocated_share * 100, 1),
+                            "Remainder (P)": round(layout.remainder_perch, 2),
+                            "Worst error %": round(layout.worst_error_pct, 2),
+                            "Grade": layout.grade,
+                            "Problem": layout.error,
+                        } for layout in results], use_container_width=True)
                         
-                        if mode == "by_area":
-                            st.session_state.final_plots = iterative_equal_area_subdivision(poly, st.session_state.target_area, st.session_state.orientation, update_prog)
-                        elif mode == "by_count":
-                            st.session_state.final_plots = subdivide_by_count(poly, st.session_state.target_count, st.session_state.orientation)
-                        elif mode == "by_width":
-                            st.session_state.final_plots = subdivide_by_width(poly, st.session_state.target_width, st.session_state.orientation)
-                        
-                        time.sleep(0.3)
-                        progress.empty()
-                        anim.empty()
-                        st.rerun()
-                    
-                    except Exception as e:
-                        progress.empty()
-                        anim.empty()
-                        st.error(f"Error: {e}")
+                        pick = st.selectbox("Layout", range(len(results)), format_func=lambda i: f"#{i+1}")
+                        if st.button("Apply Layout", use_container_width=True):
+                            layout = results[pick]
+                            st.session_state.final_plots = layout.plots
+                            st.session_state.target_area = layout.config.value
+                            st.session_state.orientation = layout.config.orientation
+                            st.rerun()
                 
                 if st.session_state.final_plots:
                     st.markdown(f"<div class='success-box'>✓ {len(st.session_state.final_plots)} plots created</div>", unsafe_allow_html=True)
@@ -1140,7 +1178,7 @@ else:
                         st.markdown("<tr><th>Plot</th><th>Area (P)</th><th>Area (m²)</th><th>Value</th></tr>", unsafe_allow_html=True)
                         
                         for idx, plot in enumerate(st.session_state.final_plots):
-                            a, _ = calculate_area(plot['coords'])
+                            a = plot_metrics(plot['coords']).area_perch
                             v = a * st.session_state.price_per_perch
                             is_rem = plot.get('is_remainder', False)
                             
@@ -1154,6 +1192,16 @@ else:
                             """, unsafe_allow_html=True)
                         
                         st.markdown("</table>", unsafe_allow_html=True)
+                    
+                    with st.expander(T['export']):
+                        fmt = st.selectbox("Format", list(EXPORT_FORMATS) + ['shapefile'], format_func=str.upper, key="export_format")
+                        if st.button("Prepare file", use_container_width=True):
+                            prepare_export(fmt)
+                        export = st.session_state.export_file
+                        # Only offer a file built from the plots on screen
+                        if export is not None and export[0] is st.session_state.final_plots and os.path.exists(export[1]):
+                            with open(export[1], 'rb') as f:
+                                st.download_button(f"⬇️ {export[2]}", f, file_name=export[2], mime=export[3], use_container_width=True)
             
             st.markdown("</div>", unsafe_allow_html=True)
     
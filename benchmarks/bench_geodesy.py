@@ -0,0 +1,34 @@
+"""Measurement and smoothing: calculate_area, batch plot metrics and smooth_boundary_curve"""
+
+import pytest
+
+from lankaland.geometry_cache import batch_metrics
+from lankaland.subdivision import calculate_area
+
+from Enhancements import smooth_boundary_curve
+from parcels import PARCELS, noisy_walk, paddy, to_latlon
+
+
+@pytest.mark.parametrize('name', PARCELS)
+def bench_calculate_area(benchmark, name):
+    benchmark.group = "calculate_area"
+    area_perch, perimeter = benchmark(calculate_area, PARCELS[name].coords)
+    assert area_perch > 0 and perimeter > 0
+
+
+def bench_batch_metrics(benchmark, parcel_plots):
+    benchmark.group = "metrics"
+    # About 1000 plots, like a report over a large scheme
+    plots = [plot for plots in parcel_plots.values() for plot in plots] * 20
+    metrics = benchmark(batch_metrics, plots)
+    benchmark.extra_info['plots'] = len(plots)
+    assert not metrics.errors
+
+
+@pytest.mark.parametrize('vertices', [100, 500])
+def bench_smooth_boundary_curve(benchmark, vertices):
+    benchmark.group = "smooth_boundary_curve"
+    walk = to_latlon(noisy_walk(paddy(vertices)))
+    smooth = benchmark(smooth_boundary_curve, walk, accuracy_m=1.0)
+    benchmark.extra_info['output_points'] = len(smooth)
+    assert len(smooth) >= 3
@@ -0,0 +1,90 @@
+"""Rendering: the 3D value figure and the folium map layers (build time and HTML size)"""
+
+import folium
+import numpy as np
+import pytest
+from shapely.geometry import Polygon
+
+from lankaland.lod import LevelOfDetail, boundary_view
+
+from Enhancements import create_3d_plot_visualization, extrude_plots
+from map_layers import CachedLayer, draw_boundary, draw_plots, render_layer_js
+from parcels import PARCELS
+
+PRICE_PER_PERCH = 250000.0
+SCHEME_COPIES = 20  # the whole scheme benchmarks repeat every parcel's plots, ~1000 plots
+
+
+@pytest.fixture(scope="module")
+def scheme(parcel_plots):
+    return [plot for plots in parcel_plots.values() for plot in plots] * SCHEME_COPIES
+
+
+@pytest.mark.parametrize('name', PARCELS)
+def bench_3d_figure(benchmark, parcel_plots, name):
+    benchmark.group = "3d figure"
+    fig = benchmark(create_3d_plot_visualization, parcel_plots[name], PRICE_PER_PERCH)
+    assert len(fig.data) == 1
+
+
+def bench_3d_figure_scheme(benchmark, scheme):
+    benchmark.group = "3d figure"
+    fig = benchmark(create_3d_plot_visualization, scheme, PRICE_PER_PERCH)
+    benchmark.extra_info['plots'] = len(scheme)
+    assert len(fig.data) == 1
+
+
+@pytest.mark.parametrize('degenerate', [[], [(6.9, 79.9)], [(6.9, 79.9), (6.9001, 79.9)]])
+def bench_3d_figure_degenerate(benchmark, parcel_plots, degenerate):
+    """A plot with under 3 vertices in the middle of the list gets no roof; every other roof stays on its own plot"""
+    benchmark.group = "3d figure"
+    plots = list(parcel_plots['l_shape'])
+    middle = len(plots) // 2
+    plots.insert(middle, {'coords': degenerate})
+    heights = np.arange(1.0, len(plots) + 1)
+    vertices, faces, vertex_plot = benchmark(extrude_plots, plots, heights)
+    # Walls always touch the ground, so roof triangles are the ones lifted off it entirely
+    roof = faces[(vertices[faces, 2] > 0).all(axis=1)]
+    roof_plot = vertex_plot[roof[:, 0]]
+    (ab, ac) = (vertices[roof[:, k], :2] - vertices[roof[:, 0], :2] for k in (1, 2))
+    roof_area = np.bincount(roof_plot, np.abs(ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]) / 2, minlength=len(plots))
+    plot_area = [Polygon(plot['coords']).area if len(plot['coords']) >= 3 else 0.0 for plot in plots]
+    assert roof_area == pytest.approx(plot_area, rel=1e-9, abs=1e-15)
+    assert np.array_equal(vertices[:, 2][vertices[:, 2] > 0], heights[vertex_plot][vertices[:, 2] > 0])
+    assert len(create_3d_plot_visualization(plots, PRICE_PER_PERCH).data) == 1
+
+
+def _page(layers):
+    """Full map page as the app sends it: satellite base map plus the cached data layers"""
+    m = folium.Map(location=list(PARCELS['rectangle'].coords[0]), zoom_start=19,
+                   tiles="https://mt1.google.com/vt/lyrs=y&x={x}&y={y}&z={z}", attr="Google Satellite")
+    for layer in layers:
+        layer.add_to(m)
+    return m.get_root().render()
+
+
+def bench_plots_layer(benchmark, scheme):
+    """Serializing the plots layer, the cost of every rerun where the plots changed"""
+    benchmark.group = "folium"
+    js = benchmark(render_layer_js, "plots", scheme, draw_plots)
+    benchmark.extra_info.update(plots=len(scheme), js_bytes=len(js))
+
+
+@pytest.mark.parametrize('name', PARCELS)
+def bench_boundary_layer(benchmark, name):
+    benchmark.group = "folium"
+    view = boundary_view(LevelOfDetail(PARCELS[name].coords, closed=True), 19)
+    js = benchmark(render_layer_js, "boundary", view, draw_boundary)
+    benchmark.extra_info['js_bytes'] = len(js)
+
+
+@pytest.mark.parametrize('name', PARCELS)
+def bench_map_html(benchmark, parcel_plots, name):
+    """Whole page for one parcel and its plots; html_bytes tracks what the browser has to load"""
+    benchmark.group = "folium"
+    parcel = PARCELS[name]
+    layers = [CachedLayer("plots", render_layer_js("plots", parcel_plots[name], draw_plots)),
+              CachedLayer("boundary", render_layer_js("boundary", boundary_view(
+                  LevelOfDetail(parcel.coords, closed=True), 19), draw_boundary))]
+    html = benchmark(_page, layers)
+    benchmark.extra_info['html_bytes'] = len(html.encode('utf-8'))
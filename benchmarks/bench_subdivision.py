@@ -0,0 +1,71 @@
+"""Subdivision engine: by area, count and width, with vertical and horizontal cuts, on every synthetic parcel"""
+
+import pytest
+
+from lankaland.geometry_cache import batch_metrics
+from lankaland.subdivision import iterative_equal_area_subdivision, subdivide_by_count, subdivide_by_width
+
+from parcels import PARCELS, PLOTS_PER_PARCEL
+
+MODES = {
+    'by_area': lambda parcel, orientation, errors: iterative_equal_area_subdivision(
+        parcel.polygon, parcel.area_perch / PLOTS_PER_PARCEL, orientation, error_callback=errors.append),
+    'by_count': lambda parcel, orientation, errors: subdivide_by_count(
+        parcel.polygon, PLOTS_PER_PARCEL, orientation, errors.append),
+    'by_width': lambda parcel, orientation, errors: subdivide_by_width(
+        parcel.polygon, parcel.width_m, orientation, errors.append),
+}
+
+# width_m splits the east-west extent into PLOTS_PER_PARCEL strips; horizontal strips of the
+# same width run across the north-south extent instead
+BY_WIDTH_HORIZONTAL_PLOTS = {'rectangle': 8, 'l_shape': 8, 'u_shape': 11, 'paddy': 11, 'holed': 12}
+AREA_REL_TOLERANCE = 1e-6  # the plots tile the parcel, so only round-off is allowed
+
+# Full plots (the rest is kept as remainders) cutting concave parcels by_area at non-axis bearings
+BEARING_FULL_PLOTS = {
+    ('l_shape', 30): 11, ('l_shape', 45): 11, ('l_shape', 117.5): 10, ('l_shape', 160): 11,
+    ('u_shape', 30): 10, ('u_shape', 45): 11, ('u_shape', 117.5): 11, ('u_shape', 160): 10,
+    ('paddy', 30): 10, ('paddy', 45): 11, ('paddy', 117.5): 11, ('paddy', 160): 11,
+}
+CUT_TOLERANCE_PERCH = 0.1
+
+
+def expected_plots(name, mode, orientation):
+    if mode == 'by_width' and orientation == 'horizontal':
+        return BY_WIDTH_HORIZONTAL_PLOTS[name]
+    return PLOTS_PER_PARCEL
+
+
+@pytest.mark.parametrize('orientation', ['vertical', 'horizontal'])
+@pytest.mark.parametrize('mode', MODES)
+@pytest.mark.parametrize('name', PARCELS)
+def bench_subdivide(benchmark, name, mode, orientation):
+    benchmark.group = f"subdivide {mode}"
+    errors = []
+    plots = benchmark(MODES[mode], PARCELS[name], orientation, errors)
+    benchmark.extra_info['plots'] = len(plots)
+    assert not errors
+    assert len(plots) == expected_plots(name, mode, orientation)
+    assert_tiles(plots, PARCELS[name])
+
+
+@pytest.mark.parametrize(('name', 'bearing'), BEARING_FULL_PLOTS)
+def bench_subdivide_bearing(benchmark, name, bearing):
+    """Cut lines at a bearing go through the rotated frame, where slabs across a concave parcel come apart"""
+    benchmark.group = "subdivide bearing"
+    parcel = PARCELS[name]
+    target = parcel.area_perch / PLOTS_PER_PARCEL
+    errors = []
+    plots = benchmark(iterative_equal_area_subdivision, parcel.polygon, target, bearing, error_callback=errors.append)
+    benchmark.extra_info['plots'] = len(plots)
+    assert not errors
+    areas = batch_metrics(plots).area_perch
+    full = [area for area, plot in zip(areas, plots) if not plot['is_remainder']]
+    assert len(full) == BEARING_FULL_PLOTS[name, bearing]
+    assert full == pytest.approx([target] * len(full), abs=CUT_TOLERANCE_PERCH)
+    assert_tiles(plots, parcel)
+
+
+def assert_tiles(plots, parcel):
+    """Plots plus remainders cover the parcel: no part of it is dropped or cut twice"""
+    assert batch_metrics(plots).area_perch.sum() == pytest.approx(parcel.area_perch, rel=AREA_REL_TOLERANCE)
@@ -0,0 +1,11 @@
+import pytest
+
+from lankaland.subdivision import subdivide_by_count
+
+from parcels import PARCELS, PLOTS_PER_PARCEL
+
+
+@pytest.fixture(scope="session")
+def parcel_plots():
+    """Plots of every synthetic parcel (by count, vertical), cut once for the rendering benchmarks"""
+    return {name: subdivide_by_count(parcel.polygon, PLOTS_PER_PARCEL) for name, parcel in PARCELS.items()}
@@ -0,0 +1,88 @@
+"""
+LankaLand Pro GIS - synthetic parcels for the benchmark suite.
+
+Shapes are laid out in metres (east, north) around a point near Kandy and
+converted to (lat, lon) with the app's own local projection, so they measure the
+same in every engine. Every generator is deterministic: a benchmark run on one
+day is comparable with a run on the next.
+
+    rectangle   convex 120 x 80 m block
+    l_shape     concave L (a 120 x 80 m block missing a 70 x 45 m corner)
+    u_shape     120 x 100 m block with a 50 x 70 m notch out of the top; cuts
+                across the notch leave its two arms as separate parts
+    paddy       500-vertex wavy paddy field boundary, ~60 m across
+    holed       self-touching keyhole ring; buffer(0) repair turns it into a
+                100 x 100 m parcel with a 30 x 30 m hole
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+
+from lankaland.geodesy import SQM_PER_PERCH
+from lankaland.projection import projection_for
+from lankaland.rings import Ring
+from lankaland.subdivision import boundary_polygon
+
+ORIGIN = (7.2906, 80.6337)   # (lat, lon)
+PLOTS_PER_PARCEL = 12        # every mode is sized to cut about this many plots
+
+
+class Parcel(NamedTuple):
+    name: str
+    coords: Ring        # boundary as entered, (lat, lon)
+    polygon: object     # shapely Polygon after boundary_polygon (buffer(0) repair)
+    area_perch: float
+    width_m: float      # cut width giving about PLOTS_PER_PARCEL plots
+
+
+def to_latlon(east_north):
+    """(east, north) metres from ORIGIN -> (lat, lon) Ring"""
+    projection = projection_for([ORIGIN])
+    ne = np.asarray(east_north, dtype=np.float64)[:, ::-1] + projection.forward([ORIGIN])[0]
+    return Ring(projection.unproject_coords(ne))
+
+
+def rectangle():
+    return [(0, 0), (120, 0), (120, 80), (0, 80)]
+
+
+def l_shape():
+    return [(0, 0), (120, 0), (120, 35), (50, 35), (50, 80), (0, 80)]
+
+
+def u_shape():
+    return [(0, 0), (120, 0), (120, 100), (85, 100), (85, 30), (35, 30), (35, 100), (0, 100)]
+
+
+def paddy(n=500, radius=60.0):
+    """Closed wavy boundary with `n` vertices, like a walked paddy field bund"""
+    theta = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    r = radius + 8 * np.sin(5 * theta) + 3 * np.sin(17 * theta + 1.0)
+    return np.column_stack([r * np.cos(theta), r * np.sin(theta)])
+
+
+def holed():
+    """Outer square, in along a slit, round the inner square the other way, and back out"""
+    return [(0, 0), (100, 0), (100, 100), (0, 100), (0, 50), (35, 50), (35, 65), (65, 65), (65, 35),
+            (35, 35), (35, 50), (0, 50)]
+
+
+def noisy_walk(coords, sigma_m=1.0, seed=7):
+    """The boundary as a GPS walk would record it: every vertex off by ~sigma_m metres"""
+    en = np.asarray(coords, dtype=np.float64)
+    return en + np.random.default_rng(seed).normal(0.0, sigma_m, en.shape)
+
+
+def make_parcel(name, east_north):
+    coords = to_latlon(east_north)
+    polygon = boundary_polygon(coords)
+    area_m2 = shapely.area(projection_for(coords).project_geometry(polygon))
+    minx, _, maxx, _ = shapely.bounds(shapely.polygons(np.asarray(east_north, dtype=np.float64)))
+    return Parcel(name, coords, polygon, area_m2 / SQM_PER_PERCH, (maxx - minx) / PLOTS_PER_PARCEL)
+
+
+PARCELS = {name: make_parcel(name, build()) for name, build in
+           (('rectangle', rectangle), ('l_shape', l_shape), ('u_shape', u_shape), ('paddy', paddy),
+                                 ('holed', holed))}
@@ -0,0 +1,52 @@
+"""
+LankaLand Pro GIS - headless core.
+
+Geodesy, projection, subdivision, metrics, import/export and project storage,
+with no Streamlit, folium, plotly or scipy anywhere in the package, so batch
+jobs, worker processes and tests can use the engines without the UI. app.py,
+map_layers.py and Enhancements.py are the UI layer on top of it.
+
+`import lankaland` loads nothing but this file. The names below are imported
+from their submodule on first use, so `from lankaland import calculate_area`
+costs only the subdivision engine (numpy + shapely):
+
+    from lankaland import boundary_polygon, iterative_equal_area_subdivision
+    plots = iterative_equal_area_subdivision(boundary_polygon(points), 10.0)
+
+Submodules can also be imported directly (lankaland.geodesy, lankaland.sweep, ...).
+"""
+
+import importlib
+
+_EXPORTS = {
+    'batch': ('load_jobs', 'run_batch'),
+    'exporters': ('EXPORT_FORMATS', 'write_export', 'write_shapefile', 'write_shapefile_zip'),
+    'geodesy': ('SQM_PER_PERCH', 'as_coords', 'haversine_distance', 'haversine_distances', 'initial_bearing',
+                'polygon_perimeter'),
+    'geometry_cache': ('batch_metrics', 'plot_metrics'),
+    'gps_ingest': ('Fix', 'GpsIngestor'),
+    'importers': ('iter_boundaries', 'load_boundaries'),
+    'project_store': ('ProjectStore',),
+    'projection': ('polygon_area_m2', 'projection_for'),
+    'rings': ('PlotSet', 'Ring'),
+    'subdivision': ('boundary_polygon', 'calculate_area', 'iterative_equal_area_subdivision', 'parse_orientation',
+                    'subdivide_by_count', 'subdivide_by_width'),
+    'subdivision_jobs': ('SubdivisionJob',),
+    'sweep': ('sweep_grid', 'sweep_layouts'),
+}
+_SUBMODULE = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_SUBMODULE)
+
+
+def __getattr__(name):
+    module = _SUBMODULE.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,168 @@
+"""
+LankaLand Pro GIS - headless batch subdivision.
+
+Reads parent parcels from a GeoJSON FeatureCollection (or a KML, GPX or CSV
+boundary file, see importers), subdivides each one on a process pool and
+streams the resulting plots back as they complete.
+
+Per-parcel parameters come from each feature's ``properties`` (KML ExtendedData,
+CSV columns) and fall back to the CLI / run_batch defaults:
+
+    mode          by_area | by_count | by_width
+    target_area   perches (by_area)
+    target_count  plots (by_count)
+    target_width  metres (by_width)
+    orientation   vertical | horizontal | cut-line bearing in degrees
+
+Usage:
+    python -m lankaland.batch parcels.geojson -o plots.geojsonl --workers 8
+    python -m lankaland.batch deeds.kml -o plots.geojsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import shapely
+from shapely.geometry import Polygon
+
+from .importers import format_for, iter_boundaries, iter_geojson_features
+from .subdivision import iterative_equal_area_subdivision, parse_orientation, subdivide_by_count, subdivide_by_width
+
+DEFAULT_PARAMS = {
+    'mode': 'by_area',
+    'target_area': 10.0,
+    'target_count': 5,
+    'target_width': 25.0,
+    'orientation': 'vertical',
+}
+
+
+def load_jobs(feature_collection, defaults=None):
+    """Turn a FeatureCollection (dict or path) into picklable jobs with WKB geometry in (lat, lon) order.
+
+    A path to a KML, GPX or CSV file is read with the streaming importers
+    (outer rings, repaired with buffer(0)); GeoJSON files are streamed feature
+    by feature and keep their holes.
+    """
+    params = dict(DEFAULT_PARAMS, **(defaults or {}))
+    if isinstance(feature_collection, (str, os.PathLike)) and format_for(feature_collection) not in (None, 'geojson'):
+        return [{
+            'id': boundary.properties.get('id') or boundary.name,
+            'wkb': shapely.to_wkb(Polygon(boundary.coords.array)),
+            **{k: boundary.properties.get(k) or v for k, v in params.items()},
+        } for boundary in iter_boundaries(feature_collection)]
+
+    if isinstance(feature_collection, (str, os.PathLike)):
+        features = iter_geojson_features(feature_collection)
+    else:
+        features = feature_collection.get('features', [])
+    jobs = []
+    for idx, feature in enumerate(features):
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') != 'Polygon':
+            continue
+        # GeoJSON is [lon, lat]; the app works in (lat, lon)
+        shell, *holes = [[(lat, lon) for lon, lat, *_ in ring] for ring in geometry['coordinates']]
+        props = feature.get('properties') or {}
+        jobs.append({
+            'id': feature.get('id', props.get('id', idx + 1)),
+            'wkb': shapely.to_wkb(Polygon(shell, holes)),
+            **{k: props.get(k, v) for k, v in params.items()},
+        })
+    return jobs
+
+
+def subdivide_job(job):
+    """Worker entry point: subdivide one parcel; never raises, errors come back in the result"""
+    result = {'id': job['id'], 'plots': [], 'error': None}
+    errors = []
+    try:
+        poly = shapely.from_wkb(job['wkb'])
+        if not poly.is_valid:
+            poly = poly.buffer(0)
+        if poly.geom_type == 'MultiPolygon':
+            poly = max(poly.geoms, key=lambda p: p.area)
+
+        mode, orientation = job['mode'], job['orientation']
+        if mode == 'by_area':
+            plots = iterative_equal_area_subdivision(poly, float(job['target_area']), orientation,
+                                                     error_callback=errors.append)
+        elif mode == 'by_count':
+            plots = subdivide_by_count(poly, int(job['target_count']), orientation, errors.append)
+        elif mode == 'by_width':
+            plots = subdivide_by_width(poly, float(job['target_width']), orientation, errors.append)
+        else:
+            raise ValueError(f"Unknown subdivision mode: {mode}")
+        result['plots'] = plots
+    except Exception as e:
+        errors.append(str(e))
+    if errors:
+        result['error'] = '; '.join(errors)
+    return result
+
+
+def run_batch(jobs, max_workers=None):
+    """Fan jobs out over a process pool and yield results in completion order"""
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(subdivide_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def result_features(result):
+    """GeoJSON features (one per plot) for a batch result"""
+    for plot in result['plots']:
+        yield {
+            'type': 'Feature',
+            'geometry': {'type': 'Polygon', 'coordinates': [[[lon, lat] for lat, lon in plot['coords']]]},
+            'properties': {
+                'parcel_id': result['id'],
+                'plot_number': plot['plot_number'],
+                'is_remainder': plot['is_remainder'],
+            },
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Subdivide a file of parcel boundaries in parallel")
+    parser.add_argument('parcels', help="input parcels (.geojson FeatureCollection, .kml/.kmz, .gpx or .csv)")
+    parser.add_argument('-o', '--output', help="newline-delimited GeoJSON output (default: stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--mode', choices=['by_area', 'by_count', 'by_width'], default=DEFAULT_PARAMS['mode'])
+    parser.add_argument('--target-area', type=float, default=DEFAULT_PARAMS['target_area'])
+    parser.add_argument('--target-count', type=int, default=DEFAULT_PARAMS['target_count'])
+    parser.add_argument('--target-width', type=float, default=DEFAULT_PARAMS['target_width'])
+    parser.add_argument('--orientation', type=parse_orientation, default=DEFAULT_PARAMS['orientation'],
+                        help='vertical, horizontal, or a cut-line bearing in degrees')
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.parcels, {
+        'mode': args.mode,
+        'target_area': args.target_area,
+        'target_count': args.target_count,
+        'target_width': args.target_width,
+        'orientation': args.orientation,
+    })
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    failed = 0
+    try:
+        for done, result in enumerate(run_batch(jobs, args.workers), 1):
+            for feature in result_features(result):
+                out.write(json.dumps(feature, separators=(',', ':')) + '\n')
+            if result['error']:
+                failed += 1
+                print(f"[{done}/{len(jobs)}] parcel {result['id']}: {result['error']}", file=sys.stderr)
+            else:
+                print(f"[{done}/{len(jobs)}] parcel {result['id']}: {len(result['plots'])} plots", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+LankaLand Pro GIS - corner extraction from walked paths.
+
+The turning angle at each vertex is measured between the chord arriving from
+`window` points back and the chord leaving to `window` points ahead, so a single
+noisy fix in the middle of a turn doesn't split or hide it (a chord's bearing is
+the length-weighted mean of its segments' bearings). Corners are the turning
+angle peaks above the threshold, with non-maximum suppression so each turn is
+reported once.
+
+find_corners does this for a whole path in a few vectorized passes.
+CornerStream does the same incrementally while walking: a vertex is decided as
+soon as every turning angle its suppression window needs is known, and the
+decision is exactly the one find_corners makes on the finished path. It reads
+the walked path in place from the Ring it is bound to (the app's gps_path), so
+the points are stored once.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .geodesy import as_coords, bearings
+from .rings import Ring
+
+DEFAULT_THRESHOLD = 30  # degrees
+DEFAULT_WINDOW = 2      # points on each side of the vertex
+
+
+def turning_angles(path, window=DEFAULT_WINDOW):
+    """Turning angle in degrees [0, 180] at every vertex; NaN where either chord is missing or zero-length"""
+    coords = as_coords(path)
+    n = len(coords)
+    turns = np.full(n, np.nan)
+    if n < 2 * window + 1:
+        return turns
+    before, vertex, after = coords[:n - 2 * window], coords[window:n - window], coords[2 * window:]
+    change = bearings(vertex, after) - bearings(before, vertex)
+    inner = np.abs((change + 180) % 360 - 180)
+    degenerate = np.all(before == vertex, axis=1) | np.all(vertex == after, axis=1)
+    turns[window:n - window] = np.where(degenerate, np.nan, inner)
+    return turns
+
+
+def _peaks(turns, threshold, radius):
+    """Mask of vertices whose turn exceeds `threshold` and is the first maximum within ±radius"""
+    t = np.where(np.isnan(turns), -np.inf, turns)
+    n = len(t)
+    if radius < 1 or n == 0:
+        return t > threshold
+    pad = np.full(radius, -np.inf)
+    left = sliding_window_view(np.concatenate([pad, t]), radius)[:n].max(axis=1)
+    right = sliding_window_view(np.concatenate([t, pad]), radius)[1:n + 1].max(axis=1)
+    return (t > threshold) & (t > left) & (t >= right)
+
+
+def find_corners(path, threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW, radius=None):
+    """Indices of the corner vertices of a walked path"""
+    radius = window if radius is None else radius
+    return np.flatnonzero(_peaks(turning_angles(path, window), threshold, radius))
+
+
+class CornerStream:
+    """Incremental find_corners over a growing Ring: update() as it grows, finish() when the walk ends"""
+
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD, window=DEFAULT_WINDOW, radius=None):
+        self.threshold = threshold
+        self.window = window
+        self.radius = window if radius is None else radius
+        self.reset(path)
+
+    def reset(self, path=None):
+        """Start over on `path`, a Ring read in place (a new empty Ring when None)"""
+        self.path = Ring() if path is None else path
+        self._seen = 0              # path points taken into account so far
+        self._turns = []            # turning angle per vertex, known for the first len() - window
+        self._decided = 0           # vertices before this index have been decided
+
+    def __len__(self):
+        return self._seen
+
+    def extend(self, points):
+        """Append points to the path; returns the indices of newly confirmed corners"""
+        self.path.extend(points)
+        return self.update()
+
+    def update(self):
+        """Take in the points appended to the path since the last call; returns newly confirmed corners"""
+        n, w = len(self.path), self.window
+        self._seen = n
+        known = len(self._turns)
+        if n - w > known:
+            start = max(0, known - w)
+            fresh = turning_angles(self.path.array[start:n], w)[known - start:n - w - start]
+            self._turns.extend(fresh.tolist())
+        # A vertex is final once the turns `radius` ahead of it are known
+        return self._decide(len(self._turns) - self.radius)
+
+    def finish(self):
+        """Decide the remaining vertices as find_corners would on the path so far"""
+        self._turns.extend([np.nan] * (self._seen - len(self._turns)))
+        return self._decide(self._seen, at_end=True)
+
+    def _decide(self, stop, at_end=False):
+        lo = self._decided
+        if stop <= lo:
+            return []
+        r = self.radius
+        start = max(0, lo - r)
+        end = len(self._turns) if at_end else stop + r
+        mask = _peaks(np.array(self._turns[start:end]), self.threshold, r)[lo - start:stop - start]
+        self._decided = stop
+        return (np.flatnonzero(mask) + lo).tolist()
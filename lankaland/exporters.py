@@ -0,0 +1,344 @@
+"""
+LankaLand Pro GIS - streaming export writers.
+
+Every writer takes any iterable of plots (a list, a PlotSet or a generator) and
+emits one feature at a time, so exporting 10,000 plots holds one chunk of plot
+metrics and one feature's text in memory, never the whole document. The text
+formats (GeoJSON, KML, DXF, CSV) are generators of string chunks: write them to
+a file with write_export, or hand the generator to a streaming HTTP response.
+Shapefiles are binary and span several files; write_shapefile streams the
+records and patches the headers at the end, and write_shapefile_zip bundles the
+files for download.
+
+A plot's colour comes from the map palette by plot number, so it is the same on
+the map and in every export, on every run. Plots that can't be measured (see
+geometry_cache.batch_metrics) are skipped.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import struct
+import tempfile
+import zipfile
+from datetime import date
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from .geodesy import as_coords
+from .geometry_cache import batch_metrics
+from .projection import projection_for
+
+PLOT_COLORS = ['#4CAF50', '#2196F3', '#FF9800', '#E91E63', '#9C27B0',
+               '#00BCD4', '#FFEB3B', '#795548', '#FF5722', '#607D8B']
+# Nearest AutoCAD Color Index for each PLOT_COLORS entry (DXF R12 has no true colour)
+PLOT_ACI = (3, 150, 30, 230, 200, 4, 2, 34, 20, 8)
+
+COORD_DECIMALS = 8      # ~1 mm in degrees
+METRICS_CHUNK = 1024    # plots measured per batch_metrics call
+DXF_TEXT_HEIGHT_M = 1.0
+
+_dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+def plot_color(number):
+    """Colour of plot `number` (1-based) on the map and in exports"""
+    return PLOT_COLORS[(number - 1) % len(PLOT_COLORS)]
+
+
+# === SHARED ===
+def _closed(coords):
+    ring = as_coords(coords)
+    if len(ring) and not (ring[0] == ring[-1]).all():
+        ring = np.vstack([ring, ring[:1]])
+    return ring
+
+
+def measured_chunks(plots):
+    """Lists of (number, plot, properties) for the measurable plots, METRICS_CHUNK plots at a time"""
+    it = iter(plots)
+    offset = 0
+    while chunk := list(islice(it, METRICS_CHUNK)):
+        metrics = batch_metrics(chunk)
+        measured = []
+        for i, plot in enumerate(chunk):
+            if i in metrics.errors:
+                continue
+            number = int(plot.get('plot_number', offset + i + 1))
+            measured.append((number, plot, {
+                'plot_number': number,
+                'is_remainder': bool(plot.get('is_remainder', False)),
+                'area_perch': round(float(metrics.area_perch[i]), 4),
+                'area_m2': round(float(metrics.area_m2[i]), 3),
+                'perimeter_m': round(float(metrics.perimeter[i]), 3),
+                'color': plot_color(number),
+            }))
+        offset += len(chunk)
+        yield measured
+
+
+def measured_plots(plots):
+    """(number, plot, properties) for each measurable plot"""
+    for chunk in measured_chunks(plots):
+        yield from chunk
+
+
+def _lonlat(coords):
+    """Closed ring as [[lon, lat], ...] rounded to COORD_DECIMALS"""
+    return _closed(coords)[:, ::-1].round(COORD_DECIMALS).tolist()
+
+
+# === GEOJSON ===
+def iter_geojson(plots, boundary=None, name=None):
+    """FeatureCollection text: the boundary (if given) followed by one feature per plot"""
+    head = {'type': 'FeatureCollection'}
+    if name:
+        head['name'] = name
+    yield _dumps(head)[:-1] + ',"features":['
+    sep = ''
+    if boundary is not None and len(boundary) >= 3:
+        yield _dumps({'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': [_lonlat(boundary)]},
+                      'properties': {'role': 'boundary'}})
+        sep = ','
+    for _, plot, props in measured_plots(plots):
+        yield sep + _dumps({'type': 'Feature', 'geometry': {'type': 'Polygon', 'coordinates': [_lonlat(plot['coords'])]},
+                            'properties': props})
+        sep = ','
+    yield ']}\n'
+
+
+# === KML ===
+def _kml_color(hex_color, alpha):
+    r, g, b = hex_color[1:3], hex_color[3:5], hex_color[5:7]
+    return f"{alpha}{b}{g}{r}".lower()
+
+
+def _kml_ring(coords):
+    return ' '.join(f"{lon:.{COORD_DECIMALS}f},{lat:.{COORD_DECIMALS}f}" for lon, lat in _lonlat(coords))
+
+
+def iter_kml(plots, boundary=None, name="LankaLand export"):
+    """KML document: one Placemark per plot, styled in its plot colour"""
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n<kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+           f"<name>{escape(str(name))}</name>")
+    if boundary is not None and len(boundary) >= 3:
+        yield ('<Placemark><name>Boundary</name><Style><LineStyle><color>ff00ffff</color><width>3</width></LineStyle>'
+               '<PolyStyle><fill>0</fill></PolyStyle></Style><Polygon><outerBoundaryIs><LinearRing><coordinates>'
+               f"{_kml_ring(boundary)}</coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>")
+    for number, plot, props in measured_plots(plots):
+        data = ''.join(f'<Data name="{k}"><value>{escape(str(v))}</value></Data>' for k, v in props.items())
+        yield (f"<Placemark><name>Plot {number}</name><Style>"
+               f"<LineStyle><color>{_kml_color(props['color'], 'ff')}</color><width>2</width></LineStyle>"
+               f"<PolyStyle><color>{_kml_color(props['color'], '80')}</color></PolyStyle></Style>"
+               f"<ExtendedData>{data}</ExtendedData><Polygon><outerBoundaryIs><LinearRing><coordinates>"
+               f"{_kml_ring(plot['coords'])}</coordinates></LinearRing></outerBoundaryIs></Polygon></Placemark>")
+    yield '</Document></kml>\n'
+
+
+# === DXF ===
+def _dxf(*pairs):
+    return ''.join(f"{code}\n{value}\n" for code, value in pairs)
+
+
+def _dxf_polyline(xy, layer, color):
+    """Closed R12 POLYLINE; xy is (easting, northing) without the repeated closing vertex"""
+    parts = [_dxf((0, 'POLYLINE'), (8, layer), (62, color), (66, 1), (70, 1), (10, 0.0), (20, 0.0), (30, 0.0))]
+    parts.extend(f"0\nVERTEX\n8\n{layer}\n10\n{x:.4f}\n20\n{y:.4f}\n30\n0.0\n" for x, y in xy.tolist())
+    parts.append(_dxf((0, 'SEQEND'), (8, layer)))
+    return ''.join(parts)
+
+
+def iter_dxf(plots, boundary=None):
+    """AutoCAD R12 DXF in local transverse Mercator metres (X = easting, Y = northing).
+
+    The projection is the app's local frame for the boundary's (or else the first
+    plot's) 0.1° cell, named in a header comment. Plots go on layer PLOTS in their
+    plot colour with their number on layer LABELS; the boundary on BOUNDARY.
+    """
+    plots = iter(plots)
+    first = next(plots, None)
+    if first is not None:
+        plots = chain([first], plots)
+    anchor = boundary if boundary is not None and len(boundary) else (first['coords'] if first is not None else None)
+    projection = projection_for(as_coords(anchor)) if anchor is not None and len(anchor) else None
+
+    yield _dxf((999, f"LankaLand Pro GIS - {projection!r} metres" if projection else "LankaLand Pro GIS"),
+               (0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1009'), (9, '$INSUNITS'), (70, 6),
+               (0, 'ENDSEC'),
+               (0, 'SECTION'), (2, 'TABLES'), (0, 'TABLE'), (2, 'LAYER'), (70, 3),
+               *[pair for layer, color in (('BOUNDARY', 2), ('PLOTS', 7), ('LABELS', 7))
+                 for pair in ((0, 'LAYER'), (2, layer), (70, 0), (62, color), (6, 'CONTINUOUS'))],
+               (0, 'ENDTAB'), (0, 'ENDSEC'),
+               (0, 'SECTION'), (2, 'ENTITIES'))
+    if projection is None:
+        yield _dxf((0, 'ENDSEC'), (0, 'EOF'))
+        return
+
+    def open_ring(coords):
+        ring = as_coords(coords)
+        return ring[:-1] if len(ring) > 1 and (ring[0] == ring[-1]).all() else ring
+
+    if boundary is not None and len(boundary) >= 3:
+        yield _dxf_polyline(projection.forward(open_ring(boundary))[:, ::-1], 'BOUNDARY', 2)
+    for chunk in measured_chunks(plots):
+        # Project the whole chunk in one call, then split it back into plots
+        rings = [open_ring(plot['coords']) for _, plot, _ in chunk]
+        if not rings:
+            continue
+        planar = np.split(projection.forward(np.concatenate(rings))[:, ::-1], np.cumsum([len(r) for r in rings])[:-1])
+        yield ''.join(_dxf_plot(number, xy) for (number, _, _), xy in zip(chunk, planar))
+    yield _dxf((0, 'ENDSEC'), (0, 'EOF'))
+
+
+def _dxf_plot(number, xy):
+    """Plot outline on PLOTS and its number on LABELS, in the plot's colour"""
+    color = PLOT_ACI[(number - 1) % len(PLOT_ACI)]
+    cx, cy = xy.mean(axis=0)
+    return _dxf_polyline(xy, 'PLOTS', color) + _dxf(
+        (0, 'TEXT'), (8, 'LABELS'), (62, color), (10, f"{cx:.4f}"), (20, f"{cy:.4f}"), (30, 0.0),
+        (40, DXF_TEXT_HEIGHT_M), (1, f"{number}"), (72, 1), (73, 2), (11, f"{cx:.4f}"), (21, f"{cy:.4f}"), (31, 0.0))
+
+
+# === CSV ===
+CSV_FIELDS = ('plot_number', 'is_remainder', 'area_perch', 'area_m2', 'perimeter_m', 'color', 'wkt')
+
+
+def iter_csv(plots):
+    """One row per plot with its metrics and its outline as WKT (lon lat)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(CSV_FIELDS)
+    for _, plot, props in measured_plots(plots):
+        ring = ', '.join(f"{lon:.{COORD_DECIMALS}f} {lat:.{COORD_DECIMALS}f}" for lon, lat in _lonlat(plot['coords']))
+        writer.writerow([*(props[k] for k in CSV_FIELDS[:-1]), f"POLYGON (({ring}))"])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+# === TEXT FORMATS ===
+EXPORT_FORMATS = {
+    # name: (chunk generator, MIME type, file extension)
+    'geojson': (iter_geojson, 'application/geo+json', '.geojson'),
+    'kml': (iter_kml, 'application/vnd.google-earth.kml+xml', '.kml'),
+    'dxf': (iter_dxf, 'application/dxf', '.dxf'),
+    'csv': (iter_csv, 'text/csv', '.csv'),
+}
+
+
+def write_export(fmt, out, plots, **options):
+    """Stream `fmt` (a key of EXPORT_FORMATS) into the text file `out`; returns characters written"""
+    chunks, _, _ = EXPORT_FORMATS[fmt]
+    written = 0
+    for chunk in chunks(plots, **options):
+        written += out.write(chunk) or 0
+    return written
+
+
+# === SHAPEFILE ===
+WGS84_PRJ = ('GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+             'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]')
+_SHP_POLYGON = 5
+# DBF columns: (name, type, width, decimals, property)
+_DBF_FIELDS = (('PLOT_NO', b'N', 8, 0, 'plot_number'), ('REMAINDER', b'L', 1, 0, 'is_remainder'),
+               ('AREA_P', b'N', 16, 4, 'area_perch'), ('AREA_M2', b'N', 16, 3, 'area_m2'),
+               ('PERIM_M', b'N', 16, 3, 'perimeter_m'), ('COLOR', b'C', 7, 0, 'color'))
+
+
+def _shp_header(file_words, bbox):
+    return (struct.pack('>7i', 9994, 0, 0, 0, 0, 0, file_words)
+            + struct.pack('<2i4d4d', 1000, _SHP_POLYGON, *bbox, 0.0, 0.0, 0.0, 0.0))
+
+
+def _dbf_header(n_records):
+    today = date.today()
+    record_len = 1 + sum(f[2] for f in _DBF_FIELDS)
+    header_len = 32 + 32 * len(_DBF_FIELDS) + 1
+    head = struct.pack('<4BIHH20x', 3, today.year - 1900, today.month, today.day, n_records, header_len, record_len)
+    fields = b''.join(struct.pack('<11sc4xBB14x', name.encode('ascii'), ftype, width, decimals)
+                      for name, ftype, width, decimals, _ in _DBF_FIELDS)
+    return head + fields + b'\r'
+
+
+def _dbf_record(props):
+    values = []
+    for _, ftype, width, decimals, key in _DBF_FIELDS:
+        value = props[key]
+        if ftype == b'L':
+            text = 'T' if value else 'F'
+        elif ftype == b'N':
+            text = f"{value:.{decimals}f}".rjust(width)
+        else:
+            text = str(value).ljust(width)
+        values.append(text[:width].encode('ascii', 'replace'))
+    return b' ' + b''.join(values)
+
+
+def write_shapefile(base_path, plots):
+    """Write base_path.shp/.shx/.dbf/.prj/.cpg (WGS84 lon/lat polygons); returns the number of plots written"""
+    bbox = [np.inf, np.inf, -np.inf, -np.inf]
+    count = 0
+    with open(base_path + '.shp', 'wb') as shp, open(base_path + '.shx', 'wb') as shx, \
+            open(base_path + '.dbf', 'wb') as dbf:
+        # Headers need the totals: write placeholders, patch them once every record is out
+        shp.write(_shp_header(0, (0.0, 0.0, 0.0, 0.0)))
+        shx.write(_shp_header(0, (0.0, 0.0, 0.0, 0.0)))
+        dbf.write(_dbf_header(0))
+        offset = 50  # in 16-bit words, after the 100-byte header
+        for _, plot, props in measured_plots(plots):
+            ring = _closed(plot['coords'])[:, ::-1]  # (lon, lat)
+            x, y = ring[:, 0], ring[:, 1]
+            if np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]) > 0:
+                ring = ring[::-1]  # outer rings run clockwise
+            lo, hi = ring.min(axis=0), ring.max(axis=0)
+            bbox = [min(bbox[0], lo[0]), min(bbox[1], lo[1]), max(bbox[2], hi[0]), max(bbox[3], hi[1])]
+            content = (struct.pack('<i4d2i', _SHP_POLYGON, lo[0], lo[1], hi[0], hi[1], 1, len(ring))
+                       + struct.pack('<i', 0) + ring.astype('<f8').tobytes())
+            count += 1
+            shp.write(struct.pack('>2i', count, len(content) // 2) + content)
+            shx.write(struct.pack('>2i', offset, len(content) // 2))
+            offset += 4 + len(content) // 2
+            dbf.write(_dbf_record(props))
+        dbf.write(b'\x1a')
+
+        if not count:
+            bbox = [0.0, 0.0, 0.0, 0.0]
+        shp.seek(0)
+        shp.write(_shp_header(offset, bbox))
+        shx.seek(0)
+        shx.write(_shp_header(50 + 4 * count, bbox))
+        dbf.seek(0)
+        dbf.write(_dbf_header(count))
+
+    with open(base_path + '.prj', 'w', encoding='ascii') as prj:
+        prj.write(WGS84_PRJ)
+    with open(base_path + '.cpg', 'w', encoding='ascii') as cpg:
+        cpg.write('UTF-8')
+    return count
+
+
+def file_stem(name, default='plots'):
+    """`name` made safe as a file name: no path separators or leading dots, `default` if nothing is left"""
+    stem = re.sub(r'[^\w.-]+', '_', str(name)).strip('._')
+    return stem or default
+
+
+def write_shapefile_zip(out, plots, name='plots'):
+    """Shapefile set zipped into the binary file `out` (streamed through a temporary directory).
+
+    `name` only names the zip members (after file_stem); the temporary files use a fixed stem.
+    """
+    stem = file_stem(name)
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'plots')
+        count = write_shapefile(base, plots)
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for ext in ('.shp', '.shx', '.dbf', '.prj', '.cpg'):
+                zf.write(base + ext, stem + ext)
+    return count
@@ -0,0 +1,116 @@
+"""
+LankaLand Pro GIS - vectorized geodesy kernel.
+
+All batch functions take (N, 2) float64 arrays of (lat, lon) in degrees, the same
+order the app stores points in, and work on the whole ring or path in one call.
+"""
+
+import math
+
+import numpy as np
+
+from .projection import projection_for
+
+EARTH_RADIUS_M = 6371000.0
+SQM_PER_PERCH = 25.29
+
+
+def as_coords(points):
+    """Coerce a list of (lat, lon) tuples (or an array) to a contiguous (N, 2) float64 array"""
+    return np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+# === SCALAR (single pair) ===
+def haversine_distance(p1, p2):
+    """Great-circle distance in metres between two (lat, lon) points"""
+    lat1, lon1 = math.radians(p1[0]), math.radians(p1[1])
+    lat2, lon2 = math.radians(p2[0]), math.radians(p2[1])
+    dlat, dlon = lat2 - lat1, lon2 - lon1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    return 2 * EARTH_RADIUS_M * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+
+def initial_bearing(p1, p2):
+    """Compass bearing in degrees [0, 360) from p1 to p2"""
+    lat1, lon1 = math.radians(p1[0]), math.radians(p1[1])
+    lat2, lon2 = math.radians(p2[0]), math.radians(p2[1])
+    dlon = lon2 - lon1
+    x = math.sin(dlon) * math.cos(lat2)
+    y = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+
+# === BATCHED ===
+def _segments(coords, closed):
+    coords = as_coords(coords)
+    if closed:
+        return coords, np.roll(coords, -1, axis=0)
+    return coords[:-1], coords[1:]
+
+
+def haversine_distances(a, b):
+    """Element-wise great-circle distances in metres between two (N, 2) arrays"""
+    a, b = np.radians(as_coords(a)), np.radians(as_coords(b))
+    dlat = b[:, 0] - a[:, 0]
+    dlon = b[:, 1] - a[:, 1]
+    h = np.sin(dlat / 2) ** 2 + np.cos(a[:, 0]) * np.cos(b[:, 0]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arctan2(np.sqrt(h), np.sqrt(1 - h))
+
+
+def bearings(a, b):
+    """Element-wise compass bearings in degrees [0, 360) from a to b"""
+    a, b = np.radians(as_coords(a)), np.radians(as_coords(b))
+    dlon = b[:, 1] - a[:, 1]
+    x = np.sin(dlon) * np.cos(b[:, 0])
+    y = np.cos(a[:, 0]) * np.sin(b[:, 0]) - np.sin(a[:, 0]) * np.cos(b[:, 0]) * np.cos(dlon)
+    return np.mod(np.degrees(np.arctan2(x, y)) + 360, 360)
+
+
+def segment_lengths(coords, closed=True):
+    """Length in metres of every edge; closed=True includes the last -> first edge"""
+    if len(coords) < 2:
+        return np.zeros(0)
+    return haversine_distances(*_segments(coords, closed))
+
+
+def segment_bearings(coords, closed=False):
+    """Bearing in degrees of every edge along the path (or ring when closed=True)"""
+    if len(coords) < 2:
+        return np.zeros(0)
+    return bearings(*_segments(coords, closed))
+
+
+def path_length(coords):
+    """Total length in metres of an open path"""
+    return float(segment_lengths(coords, closed=False).sum())
+
+
+def polygon_perimeter(coords):
+    """Perimeter in metres of a closed ring"""
+    return float(segment_lengths(coords, closed=True).sum())
+
+
+def shoelace_area_m2(coords):
+    """Unsigned shoelace area in m², computed in the project's local projected frame"""
+    coords = as_coords(coords)
+    if len(coords) < 3:
+        return 0.0
+    xy = projection_for(coords).forward(coords)
+    # Shift to the first vertex so the cross products stay well conditioned
+    x, y = xy[:, 0] - xy[0, 0], xy[:, 1] - xy[0, 1]
+    return float(0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))))
+
+
+def ring_metrics(coords):
+    """Segment lengths, bearings, perimeter and shoelace area of a ring in one vectorized pass"""
+    coords = as_coords(coords)
+    if len(coords) < 2:
+        return {'lengths': np.zeros(0), 'bearings': np.zeros(0), 'perimeter': 0.0, 'area_m2': 0.0}
+    start, end = _segments(coords, closed=True)
+    lengths = haversine_distances(start, end)
+    return {
+        'lengths': lengths,
+        'bearings': bearings(start, end),
+        'perimeter': float(lengths.sum()),
+        'area_m2': shoelace_area_m2(coords),
+    }
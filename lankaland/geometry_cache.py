@@ -0,0 +1,171 @@
+"""
+LankaLand Pro GIS - content-addressed geometry metrics cache.
+
+Plot metrics are keyed by a hash of the packed coordinate buffer, so a plot whose
+coordinates haven't changed between Streamlit reruns is measured once and then
+served from memory. Entries are evicted least-recently-used once the cache grows
+past its memory budget.
+
+batch_metrics measures many plots at once (reports over whole schemes) with the
+same rules, in one vectorized pass that bypasses the cache.
+"""
+
+import hashlib
+import sys
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+from .geodesy import SQM_PER_PERCH, as_coords, haversine_distances, polygon_perimeter
+from .projection import ORIGIN_GRID_DEG, polygon_area_m2, projection_for
+
+
+class GeometryMetrics(NamedTuple):
+    area_perch: float
+    area_m2: float
+    perimeter: float
+    centroid: tuple  # (lat, lon)
+    bounds: tuple    # (min_lat, min_lon, max_lat, max_lon)
+    is_valid: bool
+
+
+def coords_key(coords):
+    """Content hash of a coordinate sequence (identical rings share a key)"""
+    return hashlib.blake2b(as_coords(coords).tobytes(), digest_size=16).digest()
+
+
+def compute_metrics(coords):
+    """Measure a ring without the cache; same area rules as calculate_area (projected, buffer(0) repair)"""
+    if len(coords) < 3:
+        first = (coords[0][0], coords[0][1]) if coords else (0, 0)
+        return GeometryMetrics(0.0, 0.0, 0.0, first, first + first, False)
+    poly = Polygon(coords)
+    is_valid = poly.is_valid
+    if not is_valid:
+        poly = poly.buffer(0)
+    area_m2 = polygon_area_m2(coords)
+    c = poly.centroid
+    centroid = (c.x, c.y) if not c.is_empty else (coords[0][0], coords[0][1])
+    return GeometryMetrics(area_m2 / SQM_PER_PERCH, area_m2, polygon_perimeter(coords),
+                           centroid, tuple(poly.bounds), is_valid)
+
+
+class BatchMetrics(NamedTuple):
+    area_perch: np.ndarray  # per plot, NaN where the plot couldn't be measured
+    area_m2: np.ndarray
+    perimeter: np.ndarray
+    is_valid: np.ndarray    # ring valid as entered (invalid ones are measured after buffer(0) repair)
+    errors: dict            # plot index -> why it couldn't be measured
+
+
+def batch_metrics(plots):
+    """Area and perimeter of many plots in one vectorized pass over a ragged coordinate array.
+
+    Same rules as compute_metrics (projected area with buffer(0) repair, haversine
+    perimeter), without the per-plot Polygon and cache round trips. A plot that
+    can't be measured gets NaN and a reason in `errors` instead of failing the batch.
+    """
+    n = len(plots)
+    rings, owners, errors = [], [], {}
+    for i, plot in enumerate(plots):
+        try:
+            ring = as_coords(plot['coords'])
+        except (KeyError, TypeError, ValueError) as e:
+            errors[i] = f"unreadable coordinates: {e}"
+            continue
+        if not np.isfinite(ring).all():
+            errors[i] = "non-finite coordinates"
+        elif len(ring) - (len(ring) > 1 and (ring[0] == ring[-1]).all()) < 3:
+            errors[i] = "fewer than 3 points"
+        else:
+            rings.append(ring)
+            owners.append(i)
+
+    area_m2 = np.full(n, np.nan)
+    perimeter = np.full(n, np.nan)
+    is_valid = np.zeros(n, dtype=bool)
+    if rings:
+        owners = np.asarray(owners)
+        sizes = np.array([len(r) for r in rings])
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        coords = np.concatenate(rings)
+        ring_of = np.repeat(np.arange(len(rings)), sizes)
+
+        # Perimeter: every edge including the closing one, summed per ring
+        nxt = np.arange(len(coords)) + 1
+        nxt[starts + sizes - 1] = starts
+        perimeter[owners] = np.bincount(ring_of, haversine_distances(coords, coords[nxt]), minlength=len(rings))
+
+        # Area: each ring projected in the cell of its first point, as projection_for would pick
+        cells = np.floor(coords[starts] / ORIGIN_GRID_DEG).astype(np.int64)
+        xy = np.empty_like(coords)
+        _, cell_of_ring = np.unique(cells, axis=0, return_inverse=True)
+        for cell in range(cell_of_ring.max() + 1):
+            members = np.flatnonzero(cell_of_ring == cell)
+            points = np.isin(ring_of, members)
+            xy[points] = projection_for(coords[starts[members[0]]:starts[members[0]] + 1]).forward(coords[points])
+        polygons = shapely.polygons(shapely.linearrings(xy, indices=ring_of))
+        valid = shapely.is_valid(polygons)
+        polygons[~valid] = shapely.buffer(polygons[~valid], 0)
+        area_m2[owners] = shapely.area(polygons)
+        is_valid[owners] = valid
+
+    return BatchMetrics(area_m2 / SQM_PER_PERCH, area_m2, perimeter, is_valid, errors)
+
+
+class GeometryCache:
+    """LRU cache of GeometryMetrics bounded by an approximate memory budget"""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._entry_bytes = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return len(self._entries) * (self._entry_bytes or 0)
+
+    def get(self, coords):
+        key = coords_key(coords)
+        metrics = self._entries.get(key)
+        if metrics is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return metrics
+
+        self.misses += 1
+        metrics = compute_metrics(coords)
+        if self._entry_bytes is None:
+            self._entry_bytes = _entry_size(key, metrics)
+        self._entries[key] = metrics
+        while self._entries and len(self._entries) * self._entry_bytes > self.max_bytes:
+            self._entries.popitem(last=False)
+        return metrics
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+def _entry_size(key, metrics):
+    # Every entry has the same shape, so size one and reuse it for the budget
+    size = sys.getsizeof(key) + sys.getsizeof(metrics) + 64  # + OrderedDict link overhead
+    size += sum(sys.getsizeof(v) for v in metrics)
+    size += sum(sys.getsizeof(v) for v in metrics.centroid + metrics.bounds)
+    return size
+
+
+_default_cache = GeometryCache()
+
+
+def plot_metrics(coords):
+    """Cached metrics for a plot's coordinates from the shared process-wide cache"""
+    return _default_cache.get(coords)
@@ -0,0 +1,303 @@
+"""
+LankaLand Pro GIS - streaming GPS ingestion.
+
+Timestamped fixes arrive in batches (an NMEA log, a GPX track, or records from
+the browser geolocation API) and go through one pipeline:
+
+    parse -> reject poor fixes -> Kalman smoothing -> jitter dedup -> walk path
+
+Each batch is projected into the local metric frame in one call; the filter and
+dedup are then a few float operations per fix, so logs of tens of thousands of
+fixes ingest in well under a second instead of one Streamlit rerun per point.
+Jitter is dropped with a hashed spatial grid: a fix that lands within its own
+accuracy radius of a point accepted in the last REVISIT_S seconds adds nothing,
+while returning to the same spot later on (closing the loop) still counts.
+"""
+
+import io
+import math
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .projection import projection_for
+
+DEFAULT_ACCURACY_M = 5.0    # assumed when a source doesn't report accuracy
+NMEA_UERE_M = 5.0           # accuracy ~= HDOP x user equivalent range error
+MAX_ACCURACY_M = 50.0       # fixes worse than this are rejected outright
+MIN_JITTER_RADIUS_M = 1.0
+MAX_JITTER_RADIUS_M = 10.0  # also the dedup grid cell size
+REVISIT_S = 30.0
+PROCESS_NOISE = 0.5         # walking acceleration noise, m²/s³
+MAX_GAP_S = 30.0            # filter restarts after a longer signal gap
+DAY_S = 86400.0
+HALF_DAY_S = DAY_S / 2      # a time of day jumping back further than this has passed UTC midnight
+
+
+class Fix(NamedTuple):
+    t: float                # seconds since the epoch (UTC)
+    lat: float
+    lon: float
+    accuracy: Optional[float] = None  # horizontal accuracy in metres
+
+
+# === PARSERS ===
+def _nmea_checksum_ok(sentence):
+    body, star, checksum = sentence.partition('*')
+    if not star:
+        return True
+    value = 0
+    for ch in body[1:]:
+        value ^= ord(ch)
+    try:
+        return value == int(checksum[:2], 16)
+    except ValueError:
+        return False
+
+
+def _nmea_coord(value, hemisphere, degree_digits):
+    if not value:
+        return None
+    coord = float(value[:degree_digits]) + float(value[degree_digits:]) / 60
+    return -coord if hemisphere in ('S', 'W') else coord
+
+
+def _nmea_seconds(hhmmss):
+    return int(hhmmss[0:2]) * 3600 + int(hhmmss[2:4]) * 60 + float(hhmmss[4:])
+
+
+def _nmea_day(day, previous, seconds):
+    """Date (epoch seconds) of a time of day following one at `previous` on `day`, across UTC midnight"""
+    if seconds < previous - HALF_DAY_S:
+        return day + DAY_S
+    if seconds > previous + HALF_DAY_S:
+        return day - DAY_S
+    return day
+
+
+def _nmea_anchor(held, day, seconds):
+    """Timestamp GGA fixes held before the first date, walking back from a time of day known to fall on `day`"""
+    fixes = []
+    for tod, lat, lon, accuracy in reversed(held):
+        day, seconds = _nmea_day(day, seconds, tod), tod
+        fixes.append(Fix(day + tod, lat, lon, accuracy))
+    return fixes[::-1]
+
+
+def parse_nmea(lines, now=None):
+    """Yield Fix records from NMEA 0183 sentences (GGA for position/HDOP, RMC for position/date).
+
+    GGA carries no date, so its time of day is anchored to the latest RMC date
+    and moves on a day whenever it wraps past UTC midnight. GGA fixes seen
+    before any date are held back until one arrives; a log with no dated RMC
+    at all is anchored to the ingest clock (`now`, defaulting to the current
+    time) so that its last fix is the most recent one not in the future. RMC
+    fixes are only emitted by logs that have no GGA sentences, so a log with
+    both yields each epoch once.
+    """
+    day = previous = None   # date and time of day of the latest sentence, once a date is known
+    held = []               # (time of day, lat, lon, accuracy) of GGA fixes before the first date
+    seen_gga = False
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('ascii', 'ignore')
+        line = line.strip()
+        if not line.startswith('$') or not _nmea_checksum_ok(line):
+            continue
+        fields = line.split('*')[0].split(',')
+        kind = fields[0][3:]
+        try:
+            if kind == 'RMC' and len(fields) >= 10:
+                seconds = _nmea_seconds(fields[1]) if fields[1] else None
+                if fields[9] and seconds is not None:
+                    d = fields[9]
+                    day = datetime(2000 + int(d[4:6]), int(d[2:4]), int(d[0:2]), tzinfo=timezone.utc).timestamp()
+                    previous = seconds
+                    yield from _nmea_anchor(held, day, seconds)
+                    held = []
+                if seen_gga or fields[2] != 'A' or seconds is None or day is None:
+                    continue
+                lat, lon = _nmea_coord(fields[3], fields[4], 2), _nmea_coord(fields[5], fields[6], 3)
+                if lat is not None and lon is not None:
+                    day, previous = _nmea_day(day, previous, seconds), seconds
+                    yield Fix(day + seconds, lat, lon, None)
+            elif kind == 'GGA' and len(fields) >= 9:
+                seen_gga = True
+                if not fields[6] or fields[6] == '0' or not fields[1]:
+                    continue
+                lat, lon = _nmea_coord(fields[2], fields[3], 2), _nmea_coord(fields[4], fields[5], 3)
+                if lat is None or lon is None:
+                    continue
+                seconds = _nmea_seconds(fields[1])
+                accuracy = float(fields[8]) * NMEA_UERE_M if fields[8] else None
+                if day is None:
+                    held.append((seconds, lat, lon, accuracy))
+                    continue
+                day, previous = _nmea_day(day, previous, seconds), seconds
+                yield Fix(day + seconds, lat, lon, accuracy)
+        except ValueError:
+            continue  # malformed field
+
+    if held:
+        now = time.time() if now is None else now
+        today = now - now % DAY_S
+        last = held[-1][0]
+        yield from _nmea_anchor(held, today if last <= now - today else today - DAY_S, last)
+
+
+def _parse_iso_time(text):
+    dt = datetime.fromisoformat(text.strip().replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_gpx(source):
+    """Yield Fix records from the track/route points of a GPX file (path, file object or bytes)"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    for _, elem in ET.iterparse(source, events=('end',)):
+        tag = elem.tag.rsplit('}', 1)[-1]
+        if tag not in ('trkpt', 'rtept'):
+            continue
+        t, hdop = None, None
+        for child in elem:
+            name = child.tag.rsplit('}', 1)[-1]
+            if name == 'time' and child.text:
+                t = _parse_iso_time(child.text)
+            elif name == 'hdop' and child.text:
+                hdop = float(child.text)
+        if t is not None:
+            yield Fix(t, float(elem.get('lat')), float(elem.get('lon')),
+                      hdop * NMEA_UERE_M if hdop is not None else None)
+        elem.clear()
+
+
+def parse_geolocation(records):
+    """Yield Fix records from browser Geolocation API positions.
+
+    Accepts GeolocationPosition-shaped dicts ({'coords': {...}, 'timestamp': ms})
+    or flat dicts with latitude/longitude/accuracy/timestamp keys.
+    """
+    for rec in records:
+        coords = rec.get('coords', rec)
+        try:
+            yield Fix(float(rec['timestamp']) / 1000.0, float(coords['latitude']),
+                      float(coords['longitude']), coords.get('accuracy'))
+        except (KeyError, TypeError, ValueError):
+            continue
+
+
+def fixes_from_file(name, data):
+    """Fix records from an uploaded log, picking the parser from the file extension"""
+    if name.lower().endswith('.gpx'):
+        return list(parse_gpx(data))
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('ascii', 'ignore')
+    return list(parse_nmea(data.splitlines()))
+
+
+# === PIPELINE ===
+class GpsIngestor:
+    """Kalman-smoothed, jitter-deduplicated walk path built from batches of timestamped fixes"""
+
+    def __init__(self, max_accuracy_m=MAX_ACCURACY_M, process_noise=PROCESS_NOISE, revisit_s=REVISIT_S):
+        self.max_accuracy_m = max_accuracy_m
+        self.process_noise = process_noise
+        self.revisit_s = revisit_s
+        self.reset()
+
+    def reset(self):
+        self._projection = None
+        self._t = None                  # time of the last filtered fix
+        self._state = None              # [north, v_north, east, v_east]
+        self._cov = None                # shared per-axis covariance (p00, p01, p11)
+        self._grid = {}                 # cell -> [(north, east, t), ...] recently accepted
+        self.last_accuracy_m = None
+        self.received = self.rejected = self.jitter = self.accepted = 0
+
+    @property
+    def speed(self):
+        """Filtered ground speed in m/s (from real fix timestamps)"""
+        if self._state is None:
+            return 0.0
+        return math.hypot(self._state[1], self._state[3])
+
+    def ingest(self, fixes):
+        """Run a batch of Fix records through the pipeline; returns the accepted (lat, lon) points"""
+        fixes = list(fixes)
+        batch = [f for f in fixes if f.accuracy is None or f.accuracy <= self.max_accuracy_m]
+        self.received += len(fixes)
+        self.rejected += len(fixes) - len(batch)
+        if not batch:
+            return []
+
+        if self._projection is None:
+            self._projection = projection_for([(batch[0].lat, batch[0].lon)])
+        xy = self._projection.forward([(f.lat, f.lon) for f in batch])
+
+        kept = []
+        for f, (zn, ze) in zip(batch, xy.tolist()):
+            if self._t is not None and f.t < self._t:
+                self.rejected += 1  # out of order
+                continue
+            accuracy = f.accuracy if f.accuracy is not None else DEFAULT_ACCURACY_M
+            north, east = self._filter(f.t, float(zn), float(ze), accuracy)
+            self.last_accuracy_m = accuracy
+            if self._is_jitter(north, east, f.t, accuracy):
+                self.jitter += 1
+                continue
+            kept.append((north, east))
+        self.accepted += len(kept)
+
+        if not kept:
+            return []
+        return self._projection.unproject_coords(np.array(kept))
+
+    def _filter(self, t, zn, ze, accuracy):
+        # Constant-velocity Kalman filter per axis. Both axes share dt and R, so
+        # they share one covariance and only the states differ.
+        r = accuracy * accuracy
+        if self._state is None or t - self._t > MAX_GAP_S:
+            self._state = [zn, 0.0, ze, 0.0]
+            self._cov = (r, 0.0, 4.0)
+            self._t = t
+            return zn, ze
+
+        dt, q = t - self._t, self.process_noise
+        self._t = t
+        p00, p01, p11 = self._cov
+        p00 += 2 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3
+        p01 += dt * p11 + q * dt * dt / 2
+        p11 += q * dt
+        s = p00 + r
+        k0, k1 = p00 / s, p01 / s
+
+        state = self._state
+        for i, z in ((0, zn), (2, ze)):
+            pos = state[i] + state[i + 1] * dt
+            innovation = z - pos
+            state[i] = pos + k0 * innovation
+            state[i + 1] += k1 * innovation
+        self._cov = ((1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01)
+        return state[0], state[2]
+
+    def _is_jitter(self, north, east, t, accuracy):
+        radius = min(max(accuracy, MIN_JITTER_RADIUS_M), MAX_JITTER_RADIUS_M)
+        ci, cj = math.floor(north / MAX_JITTER_RADIUS_M), math.floor(east / MAX_JITTER_RADIUS_M)
+        horizon = t - self.revisit_s
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                cell = self._grid.get((ci + di, cj + dj))
+                if not cell:
+                    continue
+                if cell[0][2] < horizon:
+                    cell[:] = [p for p in cell if p[2] >= horizon]
+                for pn, pe, _ in cell:
+                    if (pn - north) ** 2 + (pe - east) ** 2 < radius * radius:
+                        return True
+        self._grid.setdefault((ci, cj), []).append((north, east, t))
+        return False
@@ -0,0 +1,412 @@
+"""
+LankaLand Pro GIS - bulk boundary import.
+
+Reads existing boundary files (GeoJSON, KML/KMZ, GPX, CSV) with streaming
+parsers, so a file holding thousands of parcels never has to fit in memory
+as a parsed document:
+
+    GeoJSON  FeatureCollection features are decoded one at a time from the
+             "features" array; newline-delimited GeoJSON (batch.py output)
+             line by line. Polygon and MultiPolygon outer rings.
+    KML      Placemark Polygons (outer rings) and closed LineStrings, via
+             iterparse with each Placemark cleared once read. KMZ is unzipped
+             on the fly.
+    GPX      each track segment and each route is one boundary.
+    CSV      a WKT column (as written by the CSV export), or lat/lon columns
+             with consecutive rows sharing an id forming one boundary.
+
+Every ring comes out as a (lat, lon) float64 array without the closing point,
+and is checked the way calculate_area checks rings: an invalid ring (self
+intersection, bow tie) is repaired with buffer(0), keeping the largest part.
+Rings are validated a chunk at a time in one vectorized shapely call.
+"""
+
+import csv
+import io
+import json
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+
+from .geodesy import as_coords
+from .rings import PlotSet, Ring
+
+REPAIR_CHUNK = 1024        # rings validated per vectorized shapely call
+READ_CHUNK = 1 << 20       # bytes of GeoJSON text read at a time
+XML_CHUNK = 1 << 16        # bytes fed to the KML parser at a time (small chunks keep the pending tree small)
+
+EXTENSIONS = {
+    '.geojson': 'geojson', '.json': 'geojson', '.geojsonl': 'geojson', '.jsonl': 'geojson',
+    '.kml': 'kml', '.kmz': 'kml',
+    '.gpx': 'gpx',
+    '.csv': 'csv', '.txt': 'csv',
+}
+
+# CSV column names, matched case-insensitively
+WKT_COLUMNS = ('wkt', 'geometry', 'geom', 'the_geom')
+LAT_COLUMNS = ('lat', 'latitude', 'y')
+LON_COLUMNS = ('lon', 'lng', 'long', 'longitude', 'x')
+ID_COLUMNS = ('boundary_id', 'boundary', 'parcel_id', 'parcel', 'plot_number', 'id', 'name')
+NAME_KEYS = ('name', 'Name', 'NAME', 'title', 'id', 'plot_number')
+
+
+class ImportedBoundary(NamedTuple):
+    name: str
+    coords: Ring        # (lat, lon), open ring (no repeated closing point)
+    repaired: bool      # invalid as given, repaired with buffer(0)
+    properties: dict    # attributes from the file (GeoJSON properties, KML ExtendedData, CSV columns)
+
+
+def format_for(filename):
+    """Import format for a file name from its extension, or None if it isn't a supported boundary file"""
+    return EXTENSIONS.get(os.path.splitext(str(filename))[1].lower())
+
+
+@contextmanager
+def _binary(source):
+    """Binary file object for a path, bytes, or an already open binary file (left open)"""
+    if isinstance(source, (bytes, bytearray)):
+        yield io.BytesIO(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield f
+    else:
+        yield source
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _name(properties, fallback):
+    for key in NAME_KEYS:
+        if properties.get(key) not in (None, ''):
+            return str(properties[key])
+    return fallback
+
+
+# === GEOJSON ===
+def _lonlat_ring(ring):
+    """GeoJSON [lon, lat(, alt)] positions -> (lat, lon) array"""
+    try:
+        return np.asarray(ring, dtype=np.float64)[:, 1::-1]
+    except (ValueError, IndexError):
+        # Ragged positions (some with altitude, some without)
+        return as_coords([(p[1], p[0]) for p in ring])
+
+
+def _json_array_items(text, start):
+    """Decode the items of the JSON array starting at text position `start` ('['), reading more as needed.
+
+    `text` is a callable returning the next chunk of the document ('' at the
+    end); only the undecoded tail of the document is kept in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos = text(), start + 1
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf):
+                break
+            more = text()
+            if not more:
+                return
+            buf, pos = more, 0
+        if buf[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            more = text()
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield item
+        pos = end
+
+
+def iter_geojson_features(source):
+    """Yield the features of a GeoJSON file one at a time.
+
+    A FeatureCollection is streamed from its "features" array; newline-delimited
+    GeoJSON is read line by line; a lone Feature or geometry yields itself.
+    """
+    with _binary(source) as raw:
+        f = io.TextIOWrapper(raw, encoding='utf-8-sig')
+        try:
+            head = f.read(READ_CHUNK)
+            key = head.find('"features"')
+            bracket = head.find('[', key) if key >= 0 else -1
+            if bracket >= 0:
+                chunks = iter([head])
+                yield from _json_array_items(lambda: next(chunks, None) or f.read(READ_CHUNK), bracket)
+                return
+            # Otherwise one JSON document per line, or a single (pretty-printed) document
+            lines = chain(io.StringIO(head + f.readline()), f)
+            first = next((line for line in lines if line.strip()), '')
+            try:
+                docs = [json.loads(first)]
+            except json.JSONDecodeError:
+                docs = [json.loads(first + ''.join(lines))]
+                lines = iter(())
+            for doc in chain(docs, (json.loads(line) for line in lines if line.strip())):
+                yield from doc.get('features', []) if doc.get('type') == 'FeatureCollection' else [doc]
+        finally:
+            f.detach()
+
+
+def _geojson_rings(source):
+    for idx, feature in enumerate(iter_geojson_features(source)):
+        geometry = feature.get('geometry', feature) if feature.get('type') == 'Feature' else feature
+        properties = feature.get('properties') or {}
+        kind = (geometry or {}).get('type')
+        if kind == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif kind == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        name = _name(properties, f"Feature {idx + 1}")
+        for part, rings in enumerate(polygons):
+            if rings:
+                yield (name if len(polygons) == 1 else f"{name} ({part + 1})"), _lonlat_ring(rings[0]), properties
+
+
+# === KML ===
+def _kml_coordinates(text):
+    """KML 'lon,lat[,alt] ...' text -> (lat, lon) array"""
+    tuples = text.replace(', ', ',').split()
+    if not tuples:
+        return np.zeros((0, 2))
+    values = np.array(','.join(tuples).split(','), dtype=np.float64)
+    if len(values) % len(tuples):
+        return as_coords([(float(t.split(',')[1]), float(t.split(',')[0])) for t in tuples])
+    return values.reshape(len(tuples), -1)[:, 1::-1]
+
+
+def _placemark(placemark):
+    """(properties, rings) of one Placemark: its name and ExtendedData, and the outer rings of its
+    Polygons plus any closed LineStrings as (lat, lon) arrays"""
+    ns = placemark.tag[:-len('Placemark')]  # '{namespace}' or ''
+    properties = {}
+    name = placemark.findtext(f'{ns}name')
+    if name:
+        properties['name'] = name.strip()
+    extended = placemark.find(f'{ns}ExtendedData')
+    if extended is not None:
+        for data in extended.iter(f'{ns}Data'):
+            properties[data.get('name')] = (data.findtext(f'{ns}value') or '').strip()
+        for data in extended.iter(f'{ns}SimpleData'):
+            properties[data.get('name')] = (data.text or '').strip()
+
+    # Single-tag find/iter calls stay in C; ElementPath paths would not
+    rings = []
+    for polygon in placemark.iter(f'{ns}Polygon'):
+        outer = polygon.find(f'{ns}outerBoundaryIs')
+        ring = outer.find(f'{ns}LinearRing') if outer is not None else None
+        text = ring.findtext(f'{ns}coordinates') if ring is not None else None
+        if text:
+            rings.append(_kml_coordinates(text))
+    for line in placemark.iter(f'{ns}LineString'):
+        ring = _kml_coordinates(line.findtext(f'{ns}coordinates') or '')
+        if len(ring) >= 4 and (ring[0] == ring[-1]).all():
+            rings.append(ring)
+    return properties, rings
+
+
+def _kml_rings(source):
+    with _binary(source) as f:
+        if zipfile.is_zipfile(f):
+            f.seek(0)
+            with zipfile.ZipFile(f) as kmz:
+                doc = next((n for n in kmz.namelist() if n.lower().endswith('.kml')), None)
+                if doc is None:
+                    raise ValueError("KMZ archive contains no .kml document")
+                with kmz.open(doc) as kml:
+                    yield from _kml_rings(kml)
+            return
+        f.seek(0)
+        parser = ET.XMLPullParser(events=('end',))
+        index = 0
+        while chunk := f.read(XML_CHUNK):
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if not elem.tag.endswith('Placemark'):
+                    continue
+                index += 1
+                properties, rings = _placemark(elem)
+                name = _name(properties, f"Placemark {index}")
+                for part, ring in enumerate(rings):
+                    yield (name if len(rings) == 1 else f"{name} ({part + 1})"), ring, properties
+                elem.clear()
+        parser.close()
+
+
+# === GPX ===
+def _gpx_rings(source):
+    with _binary(source) as f:
+        points, index = [], 0
+        properties, depth = {}, []
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            tag = _local(elem.tag)
+            if event == 'start':
+                depth.append(tag)
+                if tag in ('trk', 'rte'):
+                    properties = {}
+                if tag in ('trkseg', 'rte'):
+                    points = []
+                continue
+            depth.pop()
+            if tag in ('trkpt', 'rtept'):
+                points.append((float(elem.get('lat')), float(elem.get('lon'))))
+                elem.clear()
+            elif tag == 'name' and elem.text and depth and depth[-1] in ('trk', 'rte'):
+                properties['name'] = elem.text.strip()
+            elif tag in ('trkseg', 'rte'):
+                index += 1
+                yield _name(properties, f"{'Route' if tag == 'rte' else 'Track'} {index}"), as_coords(points), properties
+                points = []
+                elem.clear()
+
+
+# === CSV ===
+def _column(fieldnames, candidates):
+    lowered = {name.strip().lower(): name for name in fieldnames}
+    return next((lowered[c] for c in candidates if c in lowered), None)
+
+
+def _csv_rings(source):
+    with _binary(source) as raw:
+        f = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames or []
+            wkt = _column(fields, WKT_COLUMNS)
+            if wkt is not None:
+                for idx, row in enumerate(reader, 1):
+                    geometry = shapely.from_wkt(row.pop(wkt), on_invalid='ignore')
+                    parts = getattr(geometry, 'geoms', [geometry])
+                    name = _name(row, f"Row {idx}")
+                    for part, polygon in enumerate(p for p in parts if p is not None and p.geom_type == 'Polygon'):
+                        ring = np.asarray(polygon.exterior.coords)[:, 1::-1]
+                        yield (name if len(parts) == 1 else f"{name} ({part + 1})"), ring, row
+                return
+
+            lat, lon = _column(fields, LAT_COLUMNS), _column(fields, LON_COLUMNS)
+            if lat is None or lon is None:
+                raise ValueError("CSV needs a WKT column or latitude/longitude columns")
+            key = _column(fields, ID_COLUMNS)
+            current, points, index = None, [], 0
+            for row in reader:
+                group = row.get(key) if key else None
+                if points and group != current:
+                    index += 1
+                    yield _name({'name': current}, f"Boundary {index}"), as_coords(points), {'id': current}
+                    points = []
+                current = group
+                points.append((float(row[lat]), float(row[lon])))
+            if points:
+                index += 1
+                yield _name({'name': current}, f"Boundary {index}"), as_coords(points), {'id': current}
+        finally:
+            f.detach()
+
+
+IMPORT_FORMATS = {
+    'geojson': _geojson_rings,
+    'kml': _kml_rings,
+    'gpx': _gpx_rings,
+    'csv': _csv_rings,
+}
+
+
+# === VALIDATION ===
+def _clean_chunk(rings):
+    """Drop non-finite points, consecutive duplicates and closing points from many rings at once.
+
+    Returns the cleaned points, the ring each point belongs to, and the point
+    count of every ring (0..len(rings)-1), all from a few whole-chunk array passes.
+    """
+    coords = np.concatenate(rings) if rings else np.zeros((0, 2))
+    ring_of = np.repeat(np.arange(len(rings)), [len(r) for r in rings])
+    keep = np.isfinite(coords).all(axis=1)
+    coords, ring_of = coords[keep], ring_of[keep]
+
+    repeat = np.zeros(len(coords), dtype=bool)
+    repeat[1:] = (coords[1:] == coords[:-1]).all(axis=1) & (ring_of[1:] == ring_of[:-1])
+    coords, ring_of = coords[~repeat], ring_of[~repeat]
+
+    counts = np.bincount(ring_of, minlength=len(rings))
+    ends = np.cumsum(counts)
+    last = ends[counts > 1] - 1
+    closing = last[(coords[last] == coords[ends[counts > 1] - counts[counts > 1]]).all(axis=1)]
+    keep = np.ones(len(coords), dtype=bool)
+    keep[closing] = False
+    coords, ring_of = coords[keep], ring_of[keep]
+    return coords, ring_of, np.bincount(ring_of, minlength=len(rings))
+
+
+def _repair_chunk(coords, ring_of, n):
+    """(ring, repaired) for each of `n` rings: valid rings unchanged, invalid ones repaired with buffer(0); ring None if nothing is left"""
+    polygons = shapely.polygons(shapely.linearrings(coords, indices=ring_of))
+    valid = shapely.is_valid(polygons)
+    rings = np.split(coords, np.cumsum(np.bincount(ring_of, minlength=n))[:-1])
+    results = [(ring, False) for ring in rings]
+    for i in np.flatnonzero(~valid):
+        fixed = shapely.buffer(polygons[i], 0)
+        if fixed.geom_type == 'MultiPolygon':
+            fixed = max(fixed.geoms, key=lambda p: p.area)
+        if fixed.is_empty or fixed.area == 0:
+            results[i] = (None, True)
+        else:
+            results[i] = (np.asarray(fixed.exterior.coords)[:-1], True)
+    return results
+
+
+def iter_boundaries(source, fmt=None, error_callback=None):
+    """Yield an ImportedBoundary for each usable ring in `source` (path, bytes or binary file object).
+
+    `fmt` is an IMPORT_FORMATS key; by default it comes from the file name.
+    Rings that can't become a boundary (under 3 distinct points, or nothing
+    left after repair) are skipped and reported through `error_callback`.
+    """
+    if fmt is None:
+        fmt = format_for(getattr(source, 'name', source) if not isinstance(source, (bytes, bytearray)) else '')
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported boundary format: {fmt}")
+
+    rings = IMPORT_FORMATS[fmt](source)
+    while chunk := list(islice(rings, REPAIR_CHUNK)):
+        coords, ring_of, counts = _clean_chunk([ring for _, ring, _ in chunk])
+        usable = counts >= 3
+        if error_callback:
+            for i in np.flatnonzero(~usable):
+                error_callback(f"{chunk[i][0]}: fewer than 3 distinct points, skipped")
+        if not usable.any():
+            continue
+        # Renumber the usable rings 0..k-1 for the vectorized repair
+        keep = usable[ring_of]
+        renumber = np.cumsum(usable) - 1
+        repaired = _repair_chunk(coords[keep], renumber[ring_of[keep]], int(usable.sum()))
+        for (name, _, properties), (ring, was_repaired) in zip((c for c, u in zip(chunk, usable) if u), repaired):
+            if ring is None:
+                if error_callback:
+                    error_callback(f"{name}: no area left after repair, skipped")
+                continue
+            if was_repaired and error_callback:
+                error_callback(f"{name}: invalid ring repaired with buffer(0)")
+            yield ImportedBoundary(name, Ring(ring), was_repaired, properties)
+
+
+def load_boundaries(source, fmt=None, error_callback=None):
+    """All boundaries in `source` as one PlotSet (shared coordinate buffer) with name/repaired/properties metadata"""
+    return PlotSet({'coords': b.coords.array, 'name': b.name, 'repaired': b.repaired, 'properties': b.properties}
+                   for b in iter_boundaries(source, fmt, error_callback))
@@ -0,0 +1,146 @@
+"""
+LankaLand Pro GIS - incremental live stats for boundaries being entered.
+
+A LiveRingTracker keeps running shoelace and length sums for a growing list of
+points, so the sidebar and analytics card don't re-measure the whole boundary
+on every rerun. Appending a point or undoing the last one is O(1). Points are
+projected with the same local projection calculate_area uses, chosen from the
+first point. The points live in a Ring and the running sums in one growable
+(N, 3) float64 buffer, 40 bytes per point in all. Membership (`point in
+tracker`) is one vectorized pass over the Ring buffer.
+
+The shoelace sum is only the area for a simple ring. Each append tests just the
+new edge against the path for a crossing and keeps a running flag; area_m2 adds
+the closing edge. When either crosses, area_m2 falls back to
+projection.polygon_area_m2, the buffer(0) repaired area calculate_area reports.
+"""
+
+import numpy as np
+
+from .geodesy import SQM_PER_PERCH, haversine_distance
+from .projection import polygon_area_m2, projection_for
+from .rings import _MIN_CAPACITY, Ring
+
+_CROSS, _LENGTH, _TANGLED = 0, 1, 2  # columns of the running sums buffer (_TANGLED is 1.0 once the path crossed itself)
+
+
+def _side(a, b, c):
+    """Cross product (b - a) x (c - a); its sign tells which side of a-b the point c is on"""
+    return (b[..., 0] - a[..., 0]) * (c[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (c[..., 0] - a[..., 0])
+
+
+def _crosses(path, a, b):
+    """Whether segment a-b properly crosses an edge of the open path ((N, 2) array); shared endpoints don't count"""
+    if len(path) < 2:
+        return False
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    p, q = path[:-1], path[1:]
+    return bool(np.any((_side(a, b, p) * _side(a, b, q) < 0) & (_side(p, q, a) * _side(p, q, b) < 0)))
+
+
+class LiveRingTracker:
+    """Running area / perimeter / walked-distance accumulator over an appended point list"""
+
+    __slots__ = ('_points', '_sums', '_origin', '_projection', '_area')
+
+    def __init__(self, points=()):
+        self.reset()
+        for p in points:
+            self.append(p)
+
+    def reset(self):
+        self._points = Ring()
+        # Row i holds the running (cross, length, tangled) totals after point i was appended
+        self._sums = np.empty((0, 3), dtype=np.float64)
+        self._origin = None       # first point, projected (northing, easting)
+        self._projection = None
+        self._area = None         # area_m2 of the current points, once asked for
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, point):
+        if not self._points:
+            return False
+        return bool(np.any(np.all(self._points.array == (point[0], point[1]), axis=1)))
+
+    def _push(self, cross, length, tangled):
+        n = len(self._points)
+        if n == len(self._sums):
+            sums = np.empty((max(_MIN_CAPACITY, len(self._sums) * 3 // 2), 3), dtype=np.float64)
+            sums[:n] = self._sums[:n]
+            self._sums = sums
+        self._sums[n] = (cross, length, tangled)
+
+    def append(self, point):
+        point = (point[0], point[1])
+        self._area = None
+        if not self._points:
+            self._projection = projection_for([point])
+            self._origin = self._projection.forward([point])[0]
+            self._push(0.0, 0.0, 0.0)
+            self._points.append(point)
+            return
+
+        prev = self._points[-1]
+        cross, length, tangled = self._sums[len(self._points) - 1]
+        # Shoelace term in metres relative to the first point; with the origin at a
+        # vertex the closing edge contributes nothing.
+        (x0, y0), (x1, y1) = self._projection.forward([prev, point]) - self._origin
+        tangled = tangled or _crosses(self._points.array, prev, point)
+        self._push(cross + x0 * y1 - x1 * y0, length + haversine_distance(prev, point), float(tangled))
+        self._points.append(point)
+
+    def undo(self):
+        """Drop the last point; returns it (or None when empty)"""
+        if not self._points:
+            return None
+        self._area = None
+        return self._points.pop()
+
+    def sync(self, points):
+        """Catch up with an externally mutated point list; O(1) for a single append or pop"""
+        n = len(self._points)
+        if len(points) == n and (n == 0 or tuple(points[-1]) == self._points[-1]):
+            return self
+        if len(points) == n + 1 and (n == 0 or tuple(points[-2]) == self._points[-1]):
+            self.append(points[-1])
+            return self
+        if len(points) == n - 1 and (n == 1 or tuple(points[-1]) == self._points[-2]):
+            self.undo()
+            return self
+        self.reset()
+        for p in points:
+            self.append(p)
+        return self
+
+    @property
+    def path_length(self):
+        """Open path length in metres (distance walked)"""
+        n = len(self._points)
+        return float(self._sums[n - 1, _LENGTH]) if n else 0.0
+
+    @property
+    def perimeter(self):
+        """Closed ring perimeter in metres; 0 until there are 3 points"""
+        if len(self._points) < 3:
+            return 0.0
+        return self.path_length + haversine_distance(self._points[-1], self._points[0])
+
+    @property
+    def area_m2(self):
+        """Projected area of the ring: the running shoelace sum while it is simple, repaired like calculate_area when not"""
+        n = len(self._points)
+        if n < 3:
+            return 0.0
+        if self._area is None:
+            path = self._points.array
+            if self._sums[n - 1, _TANGLED] or _crosses(path, path[-1], path[0]):
+                self._area = polygon_area_m2(self._points)
+            else:
+                self._area = abs(float(self._sums[n - 1, _CROSS])) / 2
+        return self._area
+
+    @property
+    def area_perch(self):
+        return self.area_m2 / SQM_PER_PERCH
@@ -0,0 +1,147 @@
+"""
+LankaLand Pro GIS - level-of-detail geometry for the map.
+
+Long walk paths and dense boundaries are simplified (Douglas-Peucker, in the
+local projected frame) once per zoom level when they change, and the map draws
+the level matching its current zoom. Each level keeps at most one vertex per
+half pixel of deviation, so what the browser receives stays roughly constant
+however many GPS fixes were logged; levels that are still too dense (GPS
+jitter above the tolerance) are coarsened further to a fixed vertex budget.
+Edge distance labels and vertex markers are thinned to budgets the same way.
+"""
+
+import math
+
+import numpy as np
+import shapely
+
+from .geodesy import segment_lengths
+from .geometry_cache import coords_key
+from .projection import projection_for
+from .rings import Ring
+
+ZOOM_LEVELS = (12, 14, 16, 18, 20, 22)
+TOLERANCE_PX = 0.5
+MIN_LABEL_PX = 60      # an edge must be at least this long on screen to get a label
+MAX_EDGE_LABELS = 40
+MAX_LEVEL_VERTICES = 2000  # noisy logs are coarsened further until each level fits
+MAX_VERTEX_MARKERS = 200
+_WEB_MERCATOR_M_PER_PX = 156543.03392  # metres per pixel at the equator, zoom 0
+
+
+def metres_per_pixel(lat, zoom):
+    """Ground resolution of a web-mercator tile map at `lat` and `zoom`"""
+    return _WEB_MERCATOR_M_PER_PX * math.cos(math.radians(lat)) / 2 ** zoom
+
+
+def simplify_indices(xy, tolerance):
+    """Indices of the vertices Douglas-Peucker keeps for a planar (N, 2) path"""
+    if len(xy) < 3 or tolerance <= 0:
+        return np.arange(len(xy))
+    # Carry the vertex index as Z so the kept vertices map back exactly
+    line = shapely.LineString(np.column_stack([xy, np.arange(len(xy))]))
+    kept = shapely.simplify(line, tolerance, preserve_topology=False)
+    return shapely.get_coordinates(kept, include_z=True)[:, 2].astype(np.intp)
+
+
+class LevelOfDetail:
+    """Precomputed simplifications of a path (or closed ring) for each of ZOOM_LEVELS"""
+
+    def __init__(self, coords, closed=False):
+        self.coords = Ring(coords)
+        self.closed = closed
+        self._levels = {}
+        self._edge_lengths = segment_lengths(self.coords, closed=closed)
+        if not self.coords:
+            return
+
+        xy = projection_for(self.coords).forward(self.coords)
+        if closed and len(xy) > 2:
+            xy = np.vstack([xy, xy[:1]])
+        lat = self.coords[0][0]
+        for zoom in ZOOM_LEVELS:
+            tolerance = TOLERANCE_PX * metres_per_pixel(lat, zoom)
+            idx = simplify_indices(xy, tolerance)
+            while len(idx) > MAX_LEVEL_VERTICES:
+                tolerance *= 2
+                idx = simplify_indices(xy, tolerance)
+            if closed and len(idx) > 1 and idx[-1] == len(self.coords):
+                idx = idx[:-1]  # drop the repeated closing vertex
+            self._levels[zoom] = idx
+
+    def __len__(self):
+        return len(self.coords)
+
+    def level_for(self, zoom):
+        """Coarsest precomputed level that is still at least as fine as `zoom` needs"""
+        zoom = 19 if zoom is None else zoom
+        for level in ZOOM_LEVELS:
+            if level >= zoom:
+                return level
+        return ZOOM_LEVELS[-1]
+
+    def indices(self, zoom):
+        if not self._levels:
+            return np.zeros(0, dtype=np.intp)
+        return self._levels[self.level_for(zoom)]
+
+    def marker_indices(self, zoom, budget=MAX_VERTEX_MARKERS):
+        """Vertices to mark at `zoom`: that level's vertices, or a coarser level's if over budget"""
+        level = self.level_for(zoom)
+        for coarser in reversed(ZOOM_LEVELS[:ZOOM_LEVELS.index(level) + 1]):
+            idx = self._levels.get(coarser, ())
+            if len(idx) <= budget:
+                return idx
+        return idx[:0]
+
+    def at(self, zoom):
+        """Simplified coordinates to draw at `zoom`"""
+        return Ring(self.coords.array[self.indices(zoom)])
+
+    def edge_labels(self, zoom, min_px=MIN_LABEL_PX, budget=MAX_EDGE_LABELS):
+        """(edge index, length m) of the edges to label at `zoom`; every edge while within budget,
+        otherwise the longest ones that are at least `min_px` long on screen"""
+        n = len(self._edge_lengths)
+        if n <= budget:
+            return [(i, float(d)) for i, d in enumerate(self._edge_lengths)]
+        px = self._edge_lengths / metres_per_pixel(self.coords[0][0], self.level_for(zoom))
+        candidates = np.flatnonzero(px >= min_px)
+        if len(candidates) > budget:
+            top = np.argpartition(self._edge_lengths[candidates], -budget)[-budget:]
+            candidates = np.sort(candidates[top])
+        return [(int(i), float(self._edge_lengths[i])) for i in candidates]
+
+
+class LodCache:
+    """One LevelOfDetail per name, rebuilt only when its coordinates change"""
+
+    def __init__(self):
+        self._entries = {}  # name -> (coords key, LevelOfDetail)
+        self.rebuilds = 0
+
+    def get(self, name, coords, closed=False):
+        key = coords_key(coords) if len(coords) else b''
+        cached = self._entries.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, LevelOfDetail(coords, closed=closed))
+            self._entries[name] = cached
+            self.rebuilds += 1
+        return cached[1]
+
+    def clear(self):
+        self._entries.clear()
+
+
+def boundary_view(lod, zoom):
+    """Plain-data description of the boundary layer at `zoom` (hashable by MapLayerManager)"""
+    coords = lod.coords
+    n = len(coords)
+    labels = []
+    for i, dist in lod.edge_labels(zoom):
+        p1, p2 = coords[i], coords[(i + 1) % n]
+        labels.append(((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2, dist))
+    return {
+        'ring': lod.at(zoom),
+        'vertices': [(int(i), coords[i]) for i in lod.marker_indices(zoom)],
+        'labels': labels,
+    }
@@ -0,0 +1,244 @@
+"""
+LankaLand Pro GIS - persistent project store (SQLite).
+
+Projects are one summary row each (name, dates, counts, area, settings) plus
+their geometry in separate tables, so listing thousands of projects reads only
+the summary columns and no coordinates. Geometry is stored as packed float64
+(lat, lon) arrays:
+
+    rings   boundary points and walk paths, in append-only chunks. Saving a
+            walk that has only grown since the last save writes just the new
+            points; an edited list (undo, reset) is rewritten.
+    plots   one row per plot, replaced as a set when the subdivision changes.
+
+The database runs in WAL mode and one store object is shared by all sessions.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+from .rings import PlotSet, Ring
+
+DEFAULT_DB_PATH = os.environ.get("LANKALAND_DB", "lankaland_projects.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    surveyor    TEXT NOT NULL DEFAULT '',
+    survey_date TEXT NOT NULL DEFAULT '',
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL,
+    n_points    INTEGER NOT NULL DEFAULT 0,
+    n_plots     INTEGER NOT NULL DEFAULT 0,
+    area_perch  REAL NOT NULL DEFAULT 0,
+    plots_key   BLOB,
+    settings    TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS projects_updated ON projects (updated_at DESC);
+CREATE TABLE IF NOT EXISTS rings (
+    project_id  INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    kind        TEXT NOT NULL,
+    start       INTEGER NOT NULL,
+    data        BLOB NOT NULL,
+    PRIMARY KEY (project_id, kind, start)
+);
+CREATE TABLE IF NOT EXISTS plots (
+    project_id   INTEGER NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    plot_number  INTEGER NOT NULL,
+    is_remainder INTEGER NOT NULL,
+    data         BLOB NOT NULL,
+    PRIMARY KEY (project_id, plot_number)
+);
+"""
+
+RING_KINDS = ("points", "gps_path")
+
+
+class ProjectSummary(NamedTuple):
+    id: int
+    name: str
+    surveyor: str
+    survey_date: str
+    updated_at: str
+    n_points: int
+    n_plots: int
+    area_perch: float
+
+
+def pack_coords(coords):
+    """(lat, lon) sequence -> packed little-endian float64 bytes"""
+    return np.ascontiguousarray(coords, dtype='<f8').reshape(-1, 2).tobytes()
+
+
+def unpack_coords(data):
+    """Packed bytes -> Ring of (lat, lon) points"""
+    return Ring(np.frombuffer(data, dtype='<f8').reshape(-1, 2))
+
+
+def _plots_key(plots):
+    h = hashlib.blake2b(digest_size=16)
+    for plot in plots:
+        h.update(b'R' if plot.get('is_remainder') else b'P')
+        h.update(pack_coords(plot['coords']))
+    return h.digest()
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class ProjectStore:
+    """Thread-safe access to one project database"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        # Saved length and last point of each ring, so appends don't re-read blobs
+        self._ring_tails = {}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # === PROJECTS ===
+    def create_project(self, name, surveyor='', survey_date='', settings=None):
+        now = _now()
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO projects (name, surveyor, survey_date, created_at, updated_at, settings) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, surveyor, survey_date, now, now, json.dumps(settings or {})))
+            return cur.lastrowid
+
+    def list_projects(self, search='', limit=200, offset=0):
+        """Project summaries, most recently updated first; no geometry is read"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, surveyor, survey_date, updated_at, n_points, n_plots, area_perch FROM projects "
+                "WHERE name LIKE ? ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?",
+                (f"%{search}%", limit, offset)).fetchall()
+        return [ProjectSummary(*row) for row in rows]
+
+    def count_projects(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def delete_project(self, project_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+        for kind in RING_KINDS:
+            self._ring_tails.pop((project_id, kind), None)
+
+    def save_project(self, project_id, name, points=(), gps_path=(), plots=(), area_perch=0.0, surveyor='',
+                     survey_date='', settings=None):
+        """Save everything that changed: rings are appended or rewritten, plots only rewritten when different"""
+        with self._lock:
+            with self._conn:
+                tails = [self._save_ring(project_id, "points", points),
+                         self._save_ring(project_id, "gps_path", gps_path)]
+                self._save_plots(project_id, plots)
+                self._conn.execute(
+                    "UPDATE projects SET name = ?, surveyor = ?, survey_date = ?, updated_at = ?, n_points = ?, "
+                    "n_plots = ?, area_perch = ?, settings = ? WHERE id = ?",
+                    (name, surveyor, survey_date, _now(), len(points), len(plots), float(area_perch),
+                     json.dumps(settings or {}), project_id))
+            self._ring_tails.update(tails)  # only once committed; a rollback keeps the old tails
+
+    def append_walk(self, project_id, points, gps_path, area_perch=0.0):
+        """Cheap save while walking: only the boundary points, path and area, append-only when they just grew"""
+        with self._lock:
+            with self._conn:
+                tails = [self._save_ring(project_id, "points", points),
+                         self._save_ring(project_id, "gps_path", gps_path)]
+                self._conn.execute("UPDATE projects SET updated_at = ?, n_points = ?, area_perch = ? WHERE id = ?",
+                                   (_now(), len(points), float(area_perch), project_id))
+            self._ring_tails.update(tails)
+
+    # === LAZY LOADING ===
+    def load_settings(self, project_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, surveyor, survey_date, settings FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if row is None:
+            raise KeyError(project_id)
+        name, surveyor, survey_date, settings = row
+        return {'name': name, 'surveyor': surveyor, 'survey_date': survey_date, **json.loads(settings)}
+
+    def load_ring(self, project_id, kind):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM rings WHERE project_id = ? AND kind = ? ORDER BY start", (project_id, kind)).fetchall()
+        coords = unpack_coords(b''.join(data for data, in rows))
+        self._ring_tails[(project_id, kind)] = (len(coords), coords[-1] if coords else None)
+        return coords
+
+    def load_plots(self, project_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT plot_number, is_remainder, data FROM plots WHERE project_id = ? ORDER BY plot_number",
+                (project_id,)).fetchall()
+        return PlotSet({'coords': np.frombuffer(data, dtype='<f8').reshape(-1, 2), 'plot_number': number,
+                        'is_remainder': bool(rem)} for number, rem, data in rows)
+
+    def load_project(self, project_id):
+        """Settings plus all geometry of one project"""
+        project = self.load_settings(project_id)
+        project['points'] = self.load_ring(project_id, "points")
+        project['gps_path'] = self.load_ring(project_id, "gps_path")
+        project['final_plots'] = self.load_plots(project_id)
+        return project
+
+    # === INTERNALS (called with the lock held, inside a transaction) ===
+    def _ring_tail(self, project_id, kind):
+        key = (project_id, kind)
+        if key not in self._ring_tails:
+            row = self._conn.execute(
+                "SELECT start, data FROM rings WHERE project_id = ? AND kind = ? ORDER BY start DESC LIMIT 1",
+                (project_id, kind)).fetchone()
+            if row is None:
+                self._ring_tails[key] = (0, None)
+            else:
+                last = np.frombuffer(row[1], dtype='<f8').reshape(-1, 2)
+                self._ring_tails[key] = (row[0] + len(last), tuple(last[-1].tolist()))
+        return self._ring_tails[key]
+
+    def _save_ring(self, project_id, kind, coords):
+        """Write `coords` as the project's `kind` ring; returns the (key, tail) to cache once the transaction commits"""
+        key = (project_id, kind)
+        saved, last = self._ring_tail(project_id, kind)
+        n = len(coords)
+        if n == saved and (n == 0 or tuple(coords[-1]) == last):
+            return key, (saved, last)
+        if n > saved and (saved == 0 or tuple(coords[saved - 1]) == last):
+            start = saved  # the list only grew: append the new points as one chunk
+        else:
+            self._conn.execute("DELETE FROM rings WHERE project_id = ? AND kind = ?", (project_id, kind))
+            start = 0
+        if n > start:
+            self._conn.execute("INSERT INTO rings (project_id, kind, start, data) VALUES (?, ?, ?, ?)",
+                               (project_id, kind, start, pack_coords(coords[start:])))
+        return key, (n, tuple(coords[-1]) if n else None)
+
+    def _save_plots(self, project_id, plots):
+        key = _plots_key(plots)
+        row = self._conn.execute("SELECT plots_key FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if row is not None and row[0] == key:
+            return
+        self._conn.execute("DELETE FROM plots WHERE project_id = ?", (project_id,))
+        self._conn.executemany(
+            "INSERT INTO plots (project_id, plot_number, is_remainder, data) VALUES (?, ?, ?, ?)",
+            [(project_id, i + 1, int(bool(p.get('is_remainder'))), pack_coords(p['coords']))
+             for i, p in enumerate(plots)])
+        self._conn.execute("UPDATE projects SET plots_key = ? WHERE id = ?", (key, project_id))
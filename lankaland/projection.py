@@ -0,0 +1,126 @@
+"""
+LankaLand Pro GIS - local projected coordinates.
+
+A transverse Mercator on the WGS84 ellipsoid, centred near the project, turns
+(lat, lon) degrees into planar metres. Coordinates are returned as
+(northing, easting) so they keep the app's (lat, lon) axis order and the
+subdivision code can treat both frames the same way.
+
+Projections are cached per 0.1° cell, so every plot of a project (and every
+rerun) reuses one projection object. Within a cell the scale error is below
+2e-6, far under survey tolerance.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+ORIGIN_GRID_DEG = 0.1
+
+_E2 = WGS84_F * (2 - WGS84_F)
+_EP2 = _E2 / (1 - _E2)
+_E4, _E6 = _E2 ** 2, _E2 ** 3
+_M1 = 1 - _E2 / 4 - 3 * _E4 / 64 - 5 * _E6 / 256
+_M2 = 3 * _E2 / 8 + 3 * _E4 / 32 + 45 * _E6 / 1024
+_M3 = 15 * _E4 / 256 + 45 * _E6 / 1024
+_M4 = 35 * _E6 / 3072
+_E1 = (1 - math.sqrt(1 - _E2)) / (1 + math.sqrt(1 - _E2))
+
+
+def _meridian_arc(phi):
+    return WGS84_A * (_M1 * phi - _M2 * np.sin(2 * phi) + _M3 * np.sin(4 * phi) - _M4 * np.sin(6 * phi))
+
+
+class LocalTransverseMercator:
+    """Transverse Mercator (k0 = 1) with its origin at (lat0, lon0) and no false offsets"""
+
+    __slots__ = ('lat0', 'lon0', '_phi0', '_lam0', '_m0')
+
+    def __init__(self, lat0, lon0):
+        self.lat0, self.lon0 = float(lat0), float(lon0)
+        self._phi0, self._lam0 = math.radians(self.lat0), math.radians(self.lon0)
+        self._m0 = float(_meridian_arc(self._phi0))
+
+    def __repr__(self):
+        return f"LocalTransverseMercator({self.lat0:.4f}, {self.lon0:.4f})"
+
+    def __reduce__(self):
+        return (LocalTransverseMercator, (self.lat0, self.lon0))
+
+    def forward(self, coords):
+        """(N, 2) (lat, lon) degrees -> (N, 2) (northing, easting) metres"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        phi = np.radians(coords[:, 0])
+        lam = np.radians(coords[:, 1])
+        sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+        n = WGS84_A / np.sqrt(1 - _E2 * sin_phi ** 2)
+        t = (sin_phi / cos_phi) ** 2
+        c = _EP2 * cos_phi ** 2
+        a = (lam - self._lam0) * cos_phi
+        a2 = a * a
+
+        easting = n * a * (1 + a2 * ((1 - t + c) / 6 + a2 * (5 - 18 * t + t * t + 72 * c - 58 * _EP2) / 120))
+        northing = _meridian_arc(phi) - self._m0 + n * (sin_phi / cos_phi) * a2 * (
+            0.5 + a2 * ((5 - t + 9 * c + 4 * c * c) / 24 + a2 * (61 - 58 * t + t * t + 600 * c - 330 * _EP2) / 720))
+        return np.column_stack([northing, easting])
+
+    def inverse(self, coords):
+        """(N, 2) (northing, easting) metres -> (N, 2) (lat, lon) degrees"""
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        northing, easting = coords[:, 0], coords[:, 1]
+        mu = (self._m0 + northing) / (WGS84_A * _M1)
+        phi1 = (mu + (3 * _E1 / 2 - 27 * _E1 ** 3 / 32) * np.sin(2 * mu)
+                + (21 * _E1 ** 2 / 16 - 55 * _E1 ** 4 / 32) * np.sin(4 * mu)
+                + (151 * _E1 ** 3 / 96) * np.sin(6 * mu)
+                + (1097 * _E1 ** 4 / 512) * np.sin(8 * mu))
+        sin1, cos1 = np.sin(phi1), np.cos(phi1)
+        tan1 = sin1 / cos1
+        c1 = _EP2 * cos1 ** 2
+        t1 = tan1 ** 2
+        w = 1 - _E2 * sin1 ** 2
+        n1 = WGS84_A / np.sqrt(w)
+        r1 = WGS84_A * (1 - _E2) / w ** 1.5
+        d = easting / n1
+        d2 = d * d
+
+        phi = phi1 - (n1 * tan1 / r1) * d2 * (
+            0.5 - d2 * ((5 + 3 * t1 + 10 * c1 - 4 * c1 * c1 - 9 * _EP2) / 24
+                        - d2 * (61 + 90 * t1 + 298 * c1 + 45 * t1 * t1 - 252 * _EP2 - 3 * c1 * c1) / 720))
+        lam = self._lam0 + d * (1 - d2 * ((1 + 2 * t1 + c1) / 6
+                                          - d2 * (5 - 2 * c1 + 28 * t1 - 3 * c1 * c1 + 8 * _EP2 + 24 * t1 * t1) / 120)) / cos1
+        return np.column_stack([np.degrees(phi), np.degrees(lam)])
+
+    def project_geometry(self, geom):
+        """Shapely geometry in (lat, lon) -> same geometry in (northing, easting)"""
+        return shapely.transform(geom, self.forward)
+
+    def unproject_geometry(self, geom):
+        return shapely.transform(geom, self.inverse)
+
+    def unproject_coords(self, coords):
+        """Planar ring/path -> list of (lat, lon) tuples, the app's coordinate format"""
+        return [tuple(p) for p in self.inverse(coords).tolist()]
+
+
+@lru_cache(maxsize=256)
+def _projection_for_cell(cell_lat, cell_lon):
+    return LocalTransverseMercator((cell_lat + 0.5) * ORIGIN_GRID_DEG, (cell_lon + 0.5) * ORIGIN_GRID_DEG)
+
+
+def projection_for(coords):
+    """Shared projection for the 0.1° cell containing the first coordinate"""
+    lat, lon = coords[0][0], coords[0][1]
+    return _projection_for_cell(math.floor(lat / ORIGIN_GRID_DEG), math.floor(lon / ORIGIN_GRID_DEG))
+
+
+def polygon_area_m2(coords):
+    """Planar area in m² of a (lat, lon) ring, repaired with buffer(0) when invalid"""
+    poly = Polygon(projection_for(coords).forward(coords))
+    if not poly.is_valid:
+        poly = poly.buffer(0)
+    return poly.area
@@ -0,0 +1,78 @@
+"""
+LankaLand Pro GIS - server-wide cache of subdivision results.
+
+Modules are imported once per Streamlit server process, so this cache is shared
+by every session: when several surveyors run the same parcel with the same
+settings, or flip back and forth between orientations, only the first run
+computes anything. Keys are a canonical hash of the boundary (independent of
+the starting vertex and winding order) plus the subdivision settings; entries
+are evicted least-recently-used past a memory budget.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import shapely
+
+from .rings import PlotSet
+
+
+def polygon_key(polygon):
+    """Hash of the normalized polygon: the same boundary entered from any vertex, either way round"""
+    return hashlib.blake2b(shapely.to_wkb(shapely.normalize(polygon)), digest_size=16).digest()
+
+
+def subdivision_key(polygon, mode, value, orientation):
+    """Cache key for one subdivision; only the setting the mode uses takes part"""
+    return (polygon_key(polygon), mode, float(value), orientation)
+
+
+class SubdivisionCache:
+    """Thread-safe LRU of subdivision results bounded by an approximate memory budget"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()  # key -> (PlotSet, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The cached PlotSet for `key` (immutable, so shared without copying), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, plots):
+        stored = PlotSet(plots)
+        size = stored.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (stored, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+
+shared_cache = SubdivisionCache()
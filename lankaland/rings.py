@@ -0,0 +1,206 @@
+"""
+LankaLand Pro GIS - compact array-backed coordinate containers.
+
+A list of (lat, lon) tuples costs about 110 bytes per point: a pointer, a tuple
+and two float objects. Ring keeps the same points in one contiguous (N, 2)
+float64 buffer, 16 bytes per point plus spare capacity for appends. It
+still behaves like the list the app used to keep. append / extend / pop work,
+indexing yields (lat, lon) tuples, and iteration yields tuples. NumPy
+and shapely read the buffer through __array__ without copying.
+
+PlotSet stores a whole subdivision the same way. All plot coordinates sit in
+one buffer with an offset per plot. Indexing or iterating yields the usual plot
+dicts, whose 'coords' is a read-only Ring view into that buffer, so existing
+`plot['coords']` code keeps working.
+"""
+
+import numpy as np
+
+from .geodesy import as_coords
+
+_MIN_CAPACITY = 16
+
+
+class Ring:
+    """Growable (lat, lon) point sequence in one contiguous float64 buffer"""
+
+    __slots__ = ('_buf', '_n')
+
+    def __init__(self, coords=()):
+        self._buf = as_coords(coords).copy()
+        self._n = len(self._buf)
+
+    @classmethod
+    def view(cls, array):
+        """Read-only Ring over an existing (N, 2) array (no copy); appending copies it first"""
+        ring = cls.__new__(cls)
+        ring._buf = array.view()
+        ring._buf.flags.writeable = False
+        ring._n = len(array)
+        return ring
+
+    # === ARRAY ACCESS ===
+    @property
+    def array(self):
+        """(N, 2) read-only view of the points; valid until the ring is next modified"""
+        view = self._buf[:self._n]
+        view.flags.writeable = False
+        return view
+
+    def __array__(self, dtype=None, copy=None):
+        view = self.array
+        if dtype is not None and np.dtype(dtype) != view.dtype:
+            return view.astype(dtype)
+        return view.copy() if copy else view
+
+    @property
+    def nbytes(self):
+        return self._buf.nbytes
+
+    # === SEQUENCE PROTOCOL ===
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Ring(self.array[index])
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError("Ring index out of range")
+        return tuple(self._buf[index].tolist())
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __eq__(self, other):
+        if isinstance(other, Ring):
+            return np.array_equal(self.array, other.array)
+        try:
+            return len(other) == self._n and np.array_equal(self.array, as_coords(other))
+        except (TypeError, ValueError):
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Ring({self.tolist()!r})" if self._n <= 6 else f"Ring(<{self._n} points>)"
+
+    def __reduce__(self):
+        return Ring, (self.array.copy(),)
+
+    def tolist(self):
+        """Points as a list of (lat, lon) tuples"""
+        return [tuple(p) for p in self.array.tolist()]
+
+    def copy(self):
+        return Ring(self.array)
+
+    # === MUTATION ===
+    def _reserve(self, extra):
+        needed = self._n + extra
+        if needed <= len(self._buf) and self._buf.flags.writeable:
+            return
+        capacity = max(_MIN_CAPACITY, needed, len(self._buf) * 3 // 2)
+        buf = np.empty((capacity, 2), dtype=np.float64)
+        buf[:self._n] = self._buf[:self._n]
+        self._buf = buf
+
+    def append(self, point):
+        self._reserve(1)
+        self._buf[self._n] = (point[0], point[1])
+        self._n += 1
+
+    def extend(self, points):
+        points = as_coords(points)
+        self._reserve(len(points))
+        self._buf[self._n:self._n + len(points)] = points
+        self._n += len(points)
+
+    def pop(self, index=-1):
+        if not self._n:
+            raise IndexError("pop from empty Ring")
+        if index < 0:
+            index += self._n
+        point = self[index]
+        if index != self._n - 1:
+            self._reserve(0)
+            self._buf[index:self._n - 1] = self._buf[index + 1:self._n]
+        self._n -= 1
+        return point
+
+    def clear(self):
+        self._n = 0
+
+
+class PlotSet:
+    """Immutable list of plots whose coordinates share one contiguous buffer"""
+
+    __slots__ = ('_coords', '_offsets', '_meta')
+
+    def __init__(self, plots=()):
+        if isinstance(plots, PlotSet):
+            self._coords, self._offsets, self._meta = plots._coords, plots._offsets, plots._meta
+            return
+        rings = []
+        self._meta = []
+        for plot in plots:
+            rings.append(as_coords(plot['coords']))
+            self._meta.append({k: v for k, v in plot.items() if k != 'coords'})
+        self._offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rings], out=self._offsets[1:])
+        self._coords = np.concatenate(rings) if rings else np.zeros((0, 2))
+        self._coords.flags.writeable = False
+
+    @property
+    def coords(self):
+        """All plot coordinates, (total points, 2); plot i is coords[offsets[i]:offsets[i + 1]]"""
+        return self._coords
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def nbytes(self):
+        return self._coords.nbytes + self._offsets.nbytes + 240 * len(self._meta)
+
+    def ring(self, index):
+        """Plot `index` coordinates as a read-only Ring view"""
+        return Ring.view(self._coords[self._offsets[index]:self._offsets[index + 1]])
+
+    def __len__(self):
+        return len(self._meta)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PlotSet(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PlotSet index out of range")
+        return dict(self._meta[index], coords=self.ring(index))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other):
+        if not isinstance(other, PlotSet):
+            return NotImplemented
+        return (self._meta == other._meta and np.array_equal(self._offsets, other._offsets)
+                and np.array_equal(self._coords, other._coords))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"PlotSet(<{len(self)} plots, {len(self._coords)} points>)"
+
+    def __reduce__(self):
+        return _plotset_from_arrays, (self._coords, self._offsets, self._meta)
+
+
+def _plotset_from_arrays(coords, offsets, meta):
+    plots = PlotSet.__new__(PlotSet)
+    plots._coords, plots._offsets, plots._meta = np.array(coords), np.asarray(offsets), list(meta)
+    plots._coords.flags.writeable = False
+    return plots
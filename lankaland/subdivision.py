@@ -0,0 +1,426 @@
+"""
+LankaLand Pro GIS - subdivision engine.
+
+Area calculation and the equal-area / count / width subdivision algorithms, kept
+free of Streamlit so the app, the batch runner and worker processes can share them.
+
+An orientation is "vertical" (north-south cut lines), "horizontal" (east-west)
+or the bearing in degrees of the cut lines. A bearing is handled by rotating
+the projected parcel once so its cut lines run north-south, cutting it with the
+usual axis-aligned sweep, and rotating each finished plot back.
+"""
+
+import logging
+import math
+
+import numpy as np
+import shapely
+from shapely.geometry import GeometryCollection, MultiPolygon, Polygon
+from shapely.geometry.polygon import orient
+
+from .geodesy import SQM_PER_PERCH, haversine_distance, polygon_perimeter
+from .projection import polygon_area_m2, projection_for
+
+log = logging.getLogger(__name__)
+
+# === CALCULATIONS ===
+def get_distance_meters(p1, p2):
+    try:
+        return haversine_distance(p1, p2)
+    except:
+        return 0.0
+
+def calculate_area(coords):
+    if len(coords) < 3:
+        return 0.0, 0.0
+    try:
+        return polygon_area_m2(coords) / SQM_PER_PERCH, polygon_perimeter(coords)
+    except:
+        return 0.0, 0.0
+
+def boundary_polygon(coords):
+    """Shapely Polygon of a (lat, lon) boundary, repaired with buffer(0) when invalid (largest part if it splits)"""
+    poly = Polygon(coords)
+    if not poly.is_valid:
+        poly = _largest_polygon(poly.buffer(0))
+    return poly
+
+# === ORIENTATION FRAMES ===
+def parse_orientation(value):
+    """Normalize an orientation: vertical/horizontal by name, anything else a cut-line bearing in [0, 180)"""
+    if isinstance(value, str) and value.strip().lower() in ("vertical", "horizontal"):
+        return value.strip().lower()
+    return float(value) % 180
+
+def edge_bearing(coords, index):
+    """Bearing in degrees [0, 180) of boundary edge `index` (vertex index -> next) in the local projected frame"""
+    p1, p2 = coords[index], coords[(index + 1) % len(coords)]
+    (n1, e1), (n2, e2) = projection_for(coords).forward([p1, p2])
+    return math.degrees(math.atan2(e2 - e1, n2 - n1)) % 180
+
+def _rotation(orientation):
+    """Row-vector matrix taking frame coords back to the projected frame, or None for axis orientations"""
+    if isinstance(orientation, str) or not orientation:
+        return None
+    a = math.radians(orientation)
+    return np.array([[math.cos(a), math.sin(a)], [-math.sin(a), math.cos(a)]])
+
+def cut_frame(planar, orientation):
+    """(polygon in the cut frame, axis-aligned sweep orientation, back-rotation matrix or None)"""
+    rotation = _rotation(orientation)
+    if rotation is None:
+        return planar, (orientation if isinstance(orientation, str) else "vertical"), None
+    # A cut line at bearing b runs north-south after rotating by -b (the transpose)
+    return shapely.transform(planar, lambda xy: xy @ rotation.T), "vertical", rotation
+
+def from_frame(coords, rotation):
+    """Cut-frame ring coords -> (N, 2) projected array"""
+    xy = np.asarray(coords, dtype=np.float64)
+    return xy if rotation is None else xy @ rotation
+
+# === ANALYTIC CUT-LINE SOLVER ===
+def build_area_profile(polygon, orientation="vertical"):
+    """Sweep the polygon edges once and build its cumulative-area function along the cut axis.
+
+    Between consecutive vertex positions the cross-section length is linear, so the
+    area on the low side of a cut line is piecewise quadratic. Coordinates are shifted
+    to the polygon's lower-left corner to keep the sums well conditioned.
+    """
+    axis = 1 if orientation == "vertical" else 0
+    poly = orient(polygon, 1.0)
+    minx, miny = poly.bounds[0], poly.bounds[1]
+    rings = [np.asarray(poly.exterior.coords)] + [np.asarray(r.coords) for r in poly.interiors]
+
+    u0, u1, v0, v1 = [], [], [], []
+    for ring in rings:
+        ring = ring - (minx, miny)
+        u, v = ring[:, axis], ring[:, 1 - axis]
+        u0.append(u[:-1]); u1.append(u[1:])
+        v0.append(v[:-1]); v1.append(v[1:])
+    u0, u1, v0, v1 = (np.concatenate(a) for a in (u0, u1, v0, v1))
+
+    keep = u0 != u1
+    u0, u1, v0, v1 = u0[keep], u1[keep], v0[keep], v1[keep]
+    sign = np.sign(u1 - u0)
+    slope = (v1 - v0) / (u1 - u0)
+    lo_u, hi_u = np.minimum(u0, u1), np.maximum(u0, u1)
+    lo_v = np.where(u0 < u1, v0, v1)
+    hi_v = np.where(u0 < u1, v1, v0)
+
+    breaks = np.unique(np.concatenate([lo_u, hi_u]))
+    lo_idx = np.searchsorted(breaks, lo_u)
+    hi_idx = np.searchsorted(breaks, hi_u)
+
+    # Each edge adds sign * v(u) to the cross-section while it is active: a jump at
+    # its start, a jump back at its end, and its slope in between.
+    jump = np.zeros(len(breaks))
+    np.add.at(jump, lo_idx, sign * lo_v)
+    np.add.at(jump, hi_idx, -sign * hi_v)
+    d_slope = np.zeros(len(breaks))
+    np.add.at(d_slope, lo_idx, sign * slope)
+    np.add.at(d_slope, hi_idx, -sign * slope)
+
+    width = np.diff(breaks)
+    seg_slope = np.cumsum(d_slope)[:-1]
+    rise = seg_slope * width
+    seg_start = np.cumsum(jump)[:-1] + np.concatenate([[0.0], np.cumsum(rise)[:-1]])
+    seg_area = (seg_start + 0.5 * rise) * width
+    cum = np.concatenate([[0.0], np.cumsum(seg_area)])
+
+    if cum[-1] < 0:
+        seg_start, seg_slope, cum = -seg_start, -seg_slope, -cum
+
+    return {
+        'origin': (minx, miny)[axis],
+        'breaks': breaks,
+        'start': seg_start,
+        'slope': seg_slope,
+        'cum': cum,
+    }
+
+def cumulative_area_at(profile, position):
+    """Area (degrees²) of the profiled polygon on the low side of a cut position"""
+    breaks, cum = profile['breaks'], profile['cum']
+    t = np.clip(np.asarray(position, dtype=float) - profile['origin'], breaks[0], breaks[-1])
+    k = np.clip(np.searchsorted(breaks, t, side='right') - 1, 0, len(breaks) - 2)
+    x = t - breaks[k]
+    return cum[k] + profile['start'][k] * x + 0.5 * profile['slope'][k] * x * x
+
+def solve_cut_positions(profile, areas):
+    """Invert the cumulative-area function: cut positions enclosing the given areas (degrees²)"""
+    breaks, cum = profile['breaks'], profile['cum']
+    a = np.clip(np.asarray(areas, dtype=float), 0.0, cum[-1])
+    k = np.clip(np.searchsorted(cum, a, side='right') - 1, 0, len(breaks) - 2)
+    r = a - cum[k]
+    start, slope = profile['start'][k], profile['slope'][k]
+    # Stable root of 0.5*slope*x² + start*x - r = 0
+    disc = np.sqrt(np.maximum(start * start + 2.0 * slope * r, 0.0))
+    denom = start + disc
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = np.where(denom > 0, 2.0 * r / denom, 0.0)
+    x = np.clip(x, 0.0, breaks[k + 1] - breaks[k])
+    return breaks[k] + x + profile['origin']
+
+# === SUBDIVISION ALGORITHM ===
+# Subdivision runs in the local projected frame (northing, easting in metres), so
+# areas are plain m² and the 0.1 P acceptance is a fixed metric tolerance.
+CUT_TOLERANCE_M2 = 0.1 * SQM_PER_PERCH
+BOX_PAD_M = 1.0
+
+def _cut_rect(bounds, mid, orientation):
+    """Clip rectangle keeping the low side of a cut position"""
+    min_n, min_e, max_n, max_e = bounds
+    if orientation == "vertical":
+        return (min_n - BOX_PAD_M, min_e - BOX_PAD_M, max_n + BOX_PAD_M, mid)
+    return (min_n - BOX_PAD_M, min_e - BOX_PAD_M, mid, max_e + BOX_PAD_M)
+
+def _remaining_rect(bounds, mid, orientation):
+    min_n, min_e, max_n, max_e = bounds
+    if orientation == "vertical":
+        return (min_n - BOX_PAD_M, mid, max_n + BOX_PAD_M, max_e + BOX_PAD_M)
+    return (mid, min_e - BOX_PAD_M, max_n + BOX_PAD_M, max_e + BOX_PAD_M)
+
+def _clip(geom, rect):
+    """Clip a polygon to a rectangle.
+
+    GEOS' rectangle clipper skips the general overlay and is about 4x faster than
+    intersecting with a box, but doesn't promise valid output; an invalid result is
+    redone as a full intersection (which benefits from `geom` being prepared).
+    """
+    piece = shapely.clip_by_rect(geom, *rect)
+    if not piece.is_valid:
+        piece = geom.intersection(shapely.box(*rect))
+    return piece
+
+def _largest_polygon(geom):
+    if isinstance(geom, (MultiPolygon, GeometryCollection)):
+        polygons = [p for p in geom.geoms if isinstance(p, Polygon)]
+        geom = max(polygons, key=lambda p: p.area) if polygons else Polygon()
+    return geom
+
+def _bisect_cut(remaining, target_m2, orientation, bounds):
+    """60-step bisection on the largest piece below the cut, the fallback for cuts the analytic solver can't validate.
+
+    Returns (piece, mid, True) for a plot. When no cut position gives one, returns
+    (piece, mid, False) for the largest piece found under the target: a branch of
+    the polygon that only grows past the target by merging with another branch.
+    (None, None, False) when nothing could be cut at all.
+    """
+    min_n, min_e, max_n, max_e = bounds
+    if orientation == "vertical":
+        left, right = min_e, max_e
+    else:
+        left, right = min_n, max_n
+    
+    short, short_mid = None, None
+    iterations = 0
+    max_iter = 60
+    
+    while iterations < max_iter:
+        mid = (left + right) / 2
+        
+        try:
+            piece = _largest_polygon(_clip(remaining, _cut_rect(bounds, mid, orientation)))
+        except Exception as e:
+            break
+        
+        if piece.is_empty:
+            left = mid
+            iterations += 1
+            continue
+        
+        diff = piece.area - target_m2
+        
+        if abs(diff) < CUT_TOLERANCE_M2:
+            return piece, mid, True
+        elif diff > 0:
+            right = mid
+        else:
+            left = mid
+            short, short_mid = piece, mid
+        
+        iterations += 1
+    
+    return short, short_mid, False
+
+def _analytic_cut(remaining, profile, consumed, target_m2, orientation, bounds):
+    """Cut at the analytic position; (None, None) if the piece doesn't validate"""
+    mid = float(solve_cut_positions(profile, consumed + target_m2))
+    piece = _clip(remaining, _cut_rect(bounds, mid, orientation))
+    if isinstance(piece, Polygon) and abs(piece.area - target_m2) < CUT_TOLERANCE_M2:
+        return piece, mid
+    return None, None
+
+def _cut_off(remaining, piece, mid, bounds, orientation):
+    """Connected parts of `remaining` left once `piece` is cut off below `mid`, in sweep order"""
+    rest = _clip(remaining, _remaining_rect(bounds, mid, orientation))
+    if rest.area + piece.area < remaining.area * (1 - 1e-9):
+        # The cut crossed a hole or a notch and `piece` is one part of the slab; the other parts stay uncut
+        slab = _clip(remaining, _cut_rect(bounds, mid, orientation))
+        uncut = [part for part in shapely.get_parts(slab)
+                 if isinstance(part, Polygon) and not piece.contains(part.representative_point())]
+        rest = shapely.union_all([rest, *uncut])
+    parts = [part for part in shapely.get_parts(rest) if isinstance(part, Polygon) and not part.is_empty]
+    low = 1 if orientation == "vertical" else 0
+    return sorted(parts, key=lambda part: part.bounds[low])
+
+def _subdivide_planar(main_polygon, target_m2, orientation, progress_callback=None, plot_callback=None,
+                      cancel_event=None, profile=None, error_callback=None):
+    """Equal-area subdivision of a projected polygon; plot coords stay planar.
+
+    Each plot is passed to plot_callback as soon as it is cut. Setting
+    cancel_event stops before the next cut and returns the plots so far.
+    `profile` may be a precomputed build_area_profile(main_polygon, orientation).
+
+    When a cut splits what is left into several parts (the arms of a U, the
+    lobes of a paddy field), every part is subdivided in turn, so no land is
+    dropped. A branch too small to become a plot before it merges with another
+    is kept as a remainder. Remainders follow the plots, one per leftover part.
+    """
+    plots = []
+    
+    def emit(plot):
+        plots.append(plot)
+        if plot_callback:
+            plot_callback(plot)
+    
+    expected_plots = int(main_polygon.area / target_m2)
+    
+    if expected_plots == 0:
+        return []
+    
+    if profile is None:
+        profile = build_area_profile(main_polygon, orientation)
+    
+    # Connected parts still to cut, the next one last: (polygon, its profile or None, area already cut from it)
+    todo = [(main_polygon, profile, 0.0)]
+    leftovers = []
+    max_plots = expected_plots + 2
+    
+    while todo and len(plots) < max_plots:
+        if cancel_event is not None and cancel_event.is_set():
+            return plots
+        
+        if progress_callback:
+            progress_callback(len(plots), expected_plots)
+        
+        remaining, profile, consumed = todo.pop()
+        remaining_area = remaining.area
+        
+        if remaining_area < target_m2 * 1.3:
+            leftovers.append(remaining)  # a remainder plot below
+            continue
+        
+        # Every cut tried this iteration clips the same polygon
+        shapely.prepare(remaining)
+        bounds = remaining.bounds
+        
+        # The profile only describes `remaining` while it is what is left of the profiled polygon
+        if profile is None or abs(profile['cum'][-1] - consumed - remaining_area) > 1e-9 * profile['cum'][-1]:
+            profile = build_area_profile(remaining, orientation)
+            consumed = 0.0
+        
+        piece, mid = _analytic_cut(remaining, profile, consumed, target_m2, orientation, bounds)
+        is_plot = piece is not None
+        if not is_plot:
+            piece, mid, is_plot = _bisect_cut(remaining, target_m2, orientation, bounds)
+        
+        if piece is None:
+            # Report it rather than pass the whole part off as a remainder
+            message = f"Could not cut {remaining_area / SQM_PER_PERCH:.1f} P into plots; kept as a remainder"
+            if error_callback:
+                error_callback(message)
+            else:
+                log.warning(message)
+            leftovers.append(remaining)
+            continue
+        
+        if is_plot:
+            emit({
+                'coords': piece.exterior.coords,
+                'plot_number': len(plots) + 1,
+                'is_remainder': False
+            })
+        else:
+            leftovers.append(piece)
+        
+        parts = _cut_off(remaining, piece, mid, bounds, orientation)
+        if len(parts) == 1:
+            todo.append((parts[0], profile, float(cumulative_area_at(profile, mid))))
+        else:
+            todo.extend((part, None, 0.0) for part in reversed(parts))
+    
+    if progress_callback:
+        progress_callback(expected_plots, expected_plots)
+    
+    for remaining in leftovers + [part for part, _, _ in reversed(todo)]:
+        if remaining.area > 0.3 * SQM_PER_PERCH:
+            emit({
+                'coords': remaining.exterior.coords,
+                'plot_number': len(plots) + 1,
+                'is_remainder': True
+            })
+    
+    return plots
+
+def target_area_m2(planar, mode, value, orientation="vertical"):
+    """Per-plot target area in m² of a projected polygon for a subdivision mode and its setting"""
+    if mode == "by_area":
+        return value * SQM_PER_PERCH
+    if mode == "by_count":
+        return planar.area / value
+    if mode == "by_width":
+        min_n, min_e, max_n, max_e = planar.bounds
+        total_width = (max_e - min_e) if orientation == "vertical" else (max_n - min_n)
+        # The tolerance keeps projection round-off from losing a plot when the width divides exactly
+        count = max(1, int(total_width / value + 1e-6))
+        return planar.area / count
+    raise ValueError(f"Unknown subdivision mode: {mode}")
+
+def _run_subdivision(main_polygon, orientation, mode, value, progress_callback, error_callback,
+                     plot_callback=None, cancel_event=None):
+    """Project (and rotate) once, subdivide in metres, and return plots with (lat, lon) coords"""
+    try:
+        orientation = parse_orientation(orientation)
+        projection = projection_for(main_polygon.exterior.coords)
+        frame, sweep, rotation = cut_frame(projection.project_geometry(main_polygon), orientation)
+        
+        def unproject(plot):
+            # Plots leave the cut frame as they are cut, so callers can show them straight away
+            plot['coords'] = projection.unproject_coords(from_frame(plot['coords'], rotation))
+            if plot_callback:
+                plot_callback(plot)
+        
+        target_m2 = target_area_m2(frame, mode, value, sweep)
+        return _subdivide_planar(frame, target_m2, sweep, progress_callback, unproject, cancel_event,
+                                 error_callback=error_callback)
+    except Exception as e:
+        if error_callback:
+            error_callback(f"Subdivision error: {e}")
+        else:
+            log.exception("Subdivision error")
+        return []
+
+def iterative_equal_area_subdivision(main_polygon, target_area_perch, orientation="vertical", progress_callback=None,
+                                     error_callback=None, *, plot_callback=None, cancel_event=None):
+    """Equal-area subdivision using the analytic cut-line solver, falling back to bisection per plot.
+
+    orientation is "vertical", "horizontal" or a cut-line bearing in degrees.
+    Failures return [] and are passed to error_callback (the app uses st.error) or logged.
+    plot_callback receives each plot as it is cut; setting cancel_event (a
+    threading.Event) stops early with the plots cut so far.
+    """
+    return _run_subdivision(main_polygon, orientation, "by_area", target_area_perch, progress_callback,
+                            error_callback, plot_callback, cancel_event)
+
+def subdivide_by_count(main_polygon, count, orientation="vertical", error_callback=None, *, progress_callback=None,
+                       plot_callback=None, cancel_event=None):
+    """කැබලි ගණන අනුව බෙදීම"""
+    return _run_subdivision(main_polygon, orientation, "by_count", count, progress_callback, error_callback,
+                            plot_callback, cancel_event)
+
+def subdivide_by_width(main_polygon, width_m, orientation="vertical", error_callback=None, *, progress_callback=None,
+                       plot_callback=None, cancel_event=None):
+    """Width අනුව බෙදීම"""
+    return _run_subdivision(main_polygon, orientation, "by_width", width_m, progress_callback, error_callback,
+                            plot_callback, cancel_event)
@@ -0,0 +1,112 @@
+"""
+LankaLand Pro GIS - background subdivision jobs.
+
+Execute hands the subdivision to a worker thread and keeps the SubdivisionJob
+handle in the session. The script polls the handle for progress and for the
+plots cut so far instead of blocking on the whole run, and cancel() stops the
+worker before its next cut, keeping what has been cut. Completed runs go into
+the server-wide result cache, and a job whose result is already cached is
+finished as soon as it is created.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .result_cache import shared_cache, subdivision_key
+from .rings import PlotSet
+from .subdivision import iterative_equal_area_subdivision, subdivide_by_count, subdivide_by_width
+
+# Shared by all sessions; each job is a single thread of geometry work
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="subdivision")
+
+
+class SubdivisionJob:
+    """Handle to one subdivision running on the worker pool"""
+
+    def __init__(self, polygon, mode, value, orientation="vertical", cache=shared_cache):
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._plots = []
+        self._progress = (0, 0)
+        self._errors = []
+        self._cancel = threading.Event()
+        self._cache = cache
+        self._key = subdivision_key(polygon, mode, value, orientation) if cache is not None else None
+
+        cached = cache.get(self._key) if cache is not None else None
+        self.from_cache = cached is not None
+        if self.from_cache:
+            self._plots = cached
+            self._future = Future()
+            self._future.set_result(cached)
+        else:
+            self._future = _executor.submit(self._run, polygon, mode, value, orientation)
+
+    def _run(self, polygon, mode, value, orientation):
+        hooks = dict(progress_callback=self._on_progress, plot_callback=self._on_plot, cancel_event=self._cancel)
+        if mode == "by_area":
+            plots = iterative_equal_area_subdivision(polygon, value, orientation, error_callback=self._on_error, **hooks)
+        elif mode == "by_count":
+            plots = subdivide_by_count(polygon, value, orientation, self._on_error, **hooks)
+        elif mode == "by_width":
+            plots = subdivide_by_width(polygon, value, orientation, self._on_error, **hooks)
+        else:
+            raise ValueError(f"Unknown subdivision mode: {mode}")
+
+        plots = PlotSet(plots)
+        # Partial (cancelled) or failed runs aren't worth sharing
+        if self._cache is not None and not self._cancel.is_set() and not self._errors:
+            self._cache.put(self._key, plots)
+        return plots
+
+    def _on_progress(self, current, total):
+        with self._lock:
+            self._progress = (current, total)
+
+    def _on_plot(self, plot):
+        with self._lock:
+            self._plots.append(plot)
+
+    def _on_error(self, message):
+        with self._lock:
+            self._errors.append(message)
+
+    @property
+    def progress(self):
+        """Fraction of the expected plots cut so far, 0..1"""
+        if self.done:
+            return 1.0
+        with self._lock:
+            current, total = self._progress
+        return min(current / total, 1.0) if total else 0.0
+
+    @property
+    def plots(self):
+        """Plots cut so far, in (lat, lon)"""
+        with self._lock:
+            return list(self._plots)
+
+    @property
+    def errors(self):
+        with self._lock:
+            return list(self._errors)
+
+    @property
+    def done(self):
+        return self._future.done()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        """Stop before the next cut; the plots cut so far are kept"""
+        self._cancel.set()
+
+    def result(self, timeout=None):
+        """Final plots (blocks until the job finishes); unexpected failures are reported via errors"""
+        try:
+            return self._future.result(timeout)
+        except Exception as e:
+            self._on_error(f"Subdivision error: {e}")
+            return self.plots
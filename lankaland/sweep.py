@@ -0,0 +1,151 @@
+"""
+LankaLand Pro GIS - parameter sweeps over subdivision layouts.
+
+Instead of clicking Execute once per idea, a planner hands sweep_layouts a grid
+of target areas, plot counts and widths, orientations and optionally cut
+angles. Every combination is subdivided on a process pool and the layouts come
+back ranked: the largest share of the parcel in full plots first (to the
+nearest percent, whatever the plot size), then the best accuracy grade (the
+thresholds of the app's accuracy badges), then the smallest error. Layouts the
+engine could not cut, or that hold no full plot, carry an `error` and rank after
+every other layout.
+
+The boundary is projected once in the caller. Each worker turns it into one
+frame per orientation or angle (rotated once for an angle) and builds that
+frame's area profile once, and every configuration in that frame reuses both.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+
+from .geodesy import SQM_PER_PERCH
+from .projection import projection_for
+from .rings import PlotSet
+from .subdivision import _subdivide_planar, build_area_profile, cut_frame, from_frame, target_area_m2
+
+# (max % deviation from the target, grade), best first; anything worse is POOR
+ACCURACY_GRADES = ((0.5, "PERFECT"), (2, "GOOD"), (5, "FAIR"))
+GRADE_RANK = {"PERFECT": 0, "GOOD": 1, "FAIR": 2, "POOR": 3}
+
+
+def accuracy_grade(actual, target):
+    """Grade of a plot's area against its target: PERFECT / GOOD / FAIR / POOR ('' without a target)"""
+    if target == 0:
+        return ""
+    diff_pct = abs(actual - target) / target * 100
+    for limit, grade in ACCURACY_GRADES:
+        if diff_pct < limit:
+            return grade
+    return "POOR"
+
+
+class SweepConfig(NamedTuple):
+    mode: str           # by_area / by_count / by_width
+    value: float        # target perches, plot count or width in metres
+    orientation: object  # "vertical", "horizontal", or a cut-line bearing in degrees
+
+
+class Layout(NamedTuple):
+    config: SweepConfig
+    plots: PlotSet          # app-format plots with (lat, lon) coords
+    full_plots: int         # plots that aren't remainders
+    remainder_perch: float
+    worst_error_pct: float  # largest deviation of a full plot from the target
+    grade: str              # accuracy_grade of the worst full plot
+    allocated_share: float  # fraction of the parcel area in full plots
+    error: str = ""         # why the layout failed; '' when the engine cut it normally
+
+    @property
+    def rank_key(self):
+        # Shares within a percent tie, so plots cut slightly large don't beat a better grade
+        return (bool(self.error), -round(self.allocated_share * 100), GRADE_RANK.get(self.grade, 4), self.worst_error_pct)
+
+
+def sweep_grid(target_areas=(), counts=(), widths=(), orientations=("vertical", "horizontal"), angles=()):
+    """Every (mode, value, orientation) combination of the given settings"""
+    directions = list(orientations) + [float(a) % 180 for a in angles]
+    values = ([("by_area", float(v)) for v in target_areas] + [("by_count", int(v)) for v in counts]
+              + [("by_width", float(v)) for v in widths])
+    return [SweepConfig(mode, value, d) for (mode, value), d in product(values, directions)]
+
+
+# === WORKER ===
+def _frame(frames, planar, orientation):
+    """subdivision.cut_frame for `orientation`, plus the frame's area profile, built once per _evaluate call"""
+    if orientation not in frames:
+        frame, sweep, rotation = cut_frame(planar, orientation)
+        shapely.prepare(frame)
+        frames[orientation] = (frame, sweep, rotation, build_area_profile(frame, sweep))
+    return frames[orientation]
+
+
+def _areas(rings):
+    """Areas of many planar rings in one vectorized call"""
+    if not rings:
+        return np.zeros(0)
+    indices = np.repeat(np.arange(len(rings)), [len(r) for r in rings])
+    return shapely.area(shapely.polygons(shapely.linearrings(np.concatenate(rings), indices=indices)))
+
+
+def _evaluate(planar_wkb, projection, configs):
+    planar = shapely.from_wkb(planar_wkb)
+    # Frames live only as long as this chunk of the sweep, so nothing outlasts the call
+    frames = {}  # orientation -> (frame polygon, sweep orientation, rotation, profile)
+    layouts = []
+    for config in configs:
+        errors = []
+        try:
+            frame, sweep, rotation, profile = _frame(frames, planar, config.orientation)
+            target = target_area_m2(frame, config.mode, config.value, sweep)
+            plots = _subdivide_planar(frame, target, sweep, profile=profile, error_callback=errors.append)
+        except Exception as e:
+            errors.append(f"Subdivision error: {e}")
+            plots, rotation, target = [], None, 0.0
+        areas = _areas([np.asarray(p['coords']) for p in plots])
+        full = np.array([not p['is_remainder'] for p in plots], dtype=bool)
+        if not full.any() and not errors:
+            errors.append("No full plots")
+        deviations = np.abs(areas[full] - target) / target * 100 if full.any() else np.zeros(0)
+        worst = float(deviations.max()) if len(deviations) else 0.0
+        worst_area = target * (1 + worst / 100)
+
+        for p in plots:
+            p['coords'] = projection.unproject_coords(from_frame(p['coords'], rotation))
+        layouts.append(Layout(config, PlotSet(plots), int(full.sum()), float(areas[~full].sum()) / SQM_PER_PERCH, worst,
+                              accuracy_grade(worst_area, target) if full.any() else "",
+                              float(areas[full].sum() / planar.area), "; ".join(errors)))
+    return layouts
+
+
+# === API ===
+def sweep_layouts(main_polygon, configs, max_workers=None):
+    """Subdivide `main_polygon` ((lat, lon) shapely Polygon) for every SweepConfig; best layout first.
+
+    max_workers=1 evaluates in this process (no pool start-up, useful for small
+    sweeps); otherwise configurations are spread over a spawn-based process pool,
+    which is safe to start from Streamlit's threads.
+    """
+    if not configs:
+        return []
+    projection = projection_for(main_polygon.exterior.coords)
+    planar_wkb = shapely.to_wkb(projection.project_geometry(main_polygon))
+
+    workers = max_workers or min(len(configs), os.cpu_count() or 1)
+    if workers <= 1:
+        layouts = _evaluate(planar_wkb, projection, configs)
+    else:
+        # Group by orientation so each worker builds as few frames as possible
+        ordered = sorted(configs, key=lambda c: str(c.orientation))
+        size = -(-len(ordered) // workers)
+        chunks = [ordered[i:i + size] for i in range(0, len(ordered), size)]
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            results = executor.map(_evaluate, [planar_wkb] * len(chunks), [projection] * len(chunks), chunks)
+            layouts = [layout for chunk in results for layout in chunk]
+    return sorted(layouts, key=lambda layout: layout.rank_key)
@@ -0,0 +1,128 @@
+"""
+LankaLand Pro GIS - map layer manager.
+
+The folium base map (tiles and controls) never changes between reruns, so
+st_folium keeps it mounted; everything that does change is drawn into layers
+passed through st_folium's ``feature_group_to_add``.
+
+Serializing folium elements to Leaflet JS is the expensive part of a rerun
+(about a second for 300 plots), so each layer's JS is rendered once per content
+hash and replayed verbatim by a CachedLayer until that layer's data changes.
+
+Only the serialization is cached. st_folium joins every layer into one
+component argument, so all layers are still sent to the browser on each rerun
+and swapped together when any of them changes; sending just the changed
+layers would need a custom component.
+"""
+
+import hashlib
+import pickle
+
+import folium
+from jinja2 import Template
+from streamlit_folium import generate_leaflet_string
+
+from lankaland.exporters import plot_color
+from lankaland.geometry_cache import plot_metrics
+
+# Stand-in element id baked into cached JS, swapped for the real one at render time
+_LAYER_TOKEN = "lklayer"
+
+
+def content_key(content):
+    """Stable hash of a layer's inputs (lists/tuples/dicts of plain values)"""
+    return hashlib.blake2b(pickle.dumps(content, protocol=4), digest_size=16).digest()
+
+
+def render_layer_js(name, content, build):
+    """Build a FeatureGroup on a scratch map and serialize it to Leaflet JS once"""
+    scratch = folium.Map()
+    feature_group = folium.FeatureGroup(name=name).add_to(scratch)
+    build(feature_group, content)
+    js = generate_leaflet_string(feature_group, base_id=_LAYER_TOKEN)
+    return js.replace(scratch.get_name(), "map_div")
+
+
+class CachedLayer(folium.FeatureGroup):
+    """FeatureGroup whose children were serialized ahead of time"""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {{ this.cached_js() }}
+        {% endmacro %}
+    """)
+
+    def __init__(self, name, js):
+        super().__init__(name=name)
+        self._js = js
+
+    def cached_js(self):
+        # st_folium assigns the id (feature_group_<n>) just before rendering
+        return self._js.replace(_LAYER_TOKEN, self._id)
+
+
+class MapLayerManager:
+    """One cached layer per name, re-serialized only when its content changes; every layer is still sent"""
+
+    def __init__(self):
+        self._layers = {}  # name -> (content key, Leaflet JS)
+        self.rebuilds = 0
+
+    def layer(self, name, content, build):
+        """CachedLayer for `name`; `build(feature_group, content)` only runs when content changed"""
+        key = content_key(content)
+        cached = self._layers.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, render_layer_js(name, content, build))
+            self._layers[name] = cached
+            self.rebuilds += 1
+        return CachedLayer(name, cached[1])
+
+    def clear(self):
+        self._layers.clear()
+
+
+# === LAYER BUILDERS ===
+def draw_walk_path(fg, path):
+    if len(path) > 1:
+        folium.PolyLine(path, color='#00BCD4', weight=3, opacity=0.7, popup="Walking Path").add_to(fg)
+
+
+def draw_plots(fg, plots):
+    for idx, plot in enumerate(plots):
+        color = plot_color(idx + 1)
+        metrics = plot_metrics(plot['coords'])
+        is_rem = plot.get('is_remainder', False)
+
+        folium.Polygon(
+            locations=plot['coords'],
+            color=color,
+            weight=3,
+            fill=True,
+            fill_opacity=0.5,
+            popup=f"<b>Plot #{idx+1}</b><br>Area: {metrics.area_perch:.2f} P<br>{'[Remainder]' if is_rem else ''}"
+        ).add_to(fg)
+
+        folium.Marker(
+            metrics.centroid,
+            icon=folium.DivIcon(html=f'<div style="font-size:16pt;font-weight:900;color:white;background:{color};padding:8px;border-radius:50%;width:40px;height:40px;text-align:center;line-height:40px;border:3px solid white;">{idx+1}</div>')
+        ).add_to(fg)
+
+
+def draw_boundary(fg, view):
+    """Boundary layer from lod.boundary_view: simplified ring, kept vertices, thinned edge labels"""
+    points = view['ring']
+    if len(points) >= 2:
+        folium.Polygon(
+            locations=points,
+            color="yellow",
+            weight=5,
+            fill=False,
+            dashArray="10, 10"
+        ).add_to(fg)
+
+    for lat, lon, dist in view['labels']:
+        folium.Marker([lat, lon], icon=folium.DivIcon(html=f'<div style="background:black;color:white;padding:5px;border-radius:5px;font-weight:bold;">{dist:.1f}m</div>')).add_to(fg)
+
+    for i, p in view['vertices']:
+        folium.Marker(location=p, draggable=True, icon=folium.Icon(color="green"), popup=f"Point {i+1}").add_to(fg)